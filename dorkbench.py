@@ -0,0 +1,492 @@
+"""Offline benchmark for the DorkParser engines.
+
+Serves the recorded result pages in fixtures/serp from a local stand-in
+HTTP server (run in its own process, with configurable latency, jitter and
+error rates) and drives the real scheduler/fetch/parse/filter path of any
+engine backend against it. Every link in a served page gets a per-(dork,
+page) path prefix so the dedup index sees realistic unique URLs, unless
+--repeat-urls is given.
+
+    python dorkbench.py --backend pipeline --dorks 200 -c 50 -o bench.json
+    python dorkbench.py --backend async --compare bench.json
+
+Reports pages/sec, URLs/sec, p50/p99 page latency (task handed out ->
+page filtered), peak RSS and CPU seconds for the fetch, parse and filter
+stages. Results are written as JSON; --compare exits non-zero when a
+throughput or latency figure regresses by more than --tolerance.
+
+--startup instead times cold starts in fresh interpreters: importing the
+engine, listing engines and importing the GUI module, against a bare
+python. It exits non-zero if any of them loads the network stack, a
+parser library or a process pool at startup:
+
+    python dorkbench.py --startup --repeat 20
+
+--crash checks that a journaled run to a gzip file survives being
+killed: it runs the dorkengine CLI with -o results.txt.gz -j journal.db
+once uninterrupted, then again SIGKILLing it --kills times and resuming.
+It exits non-zero unless the resumed file reads back cleanly and holds
+every URL of the uninterrupted one:
+
+    python dorkbench.py --crash --kills 3 --dorks 400 --max-pages 3
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'serp')
+
+# Links get a per-page prefix so every (dork, page) yields fresh URLs
+_LINK = re.compile(r'((?:href="|"link": ")https?://[^/"]+/)')
+
+def engine_slug(engine_name):
+    return re.sub(r'[^a-z0-9]+', '-', engine_name.lower()).strip('-')
+
+def load_fixtures(directory=FIXTURES):
+    """Return {engine name: (slug, content type, body)} from directory/expected.json"""
+    with open(os.path.join(directory, 'expected.json'), 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    pages = {}
+    for engine_name, entry in expected.items():
+        with open(os.path.join(directory, entry['file']), 'r', encoding='utf-8') as f:
+            body = f.read()
+        content_type = 'application/json' if entry['file'].endswith('.json') else 'text/html; charset=utf-8'
+        pages[engine_name] = (engine_slug(engine_name), content_type, body)
+    return pages
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        config = self.server.config
+        parts = urlsplit(self.path)
+        page = self.server.pages.get(parts.path.strip('/'))
+        if page is None:
+            self.respond(404, 'text/plain', b'unknown engine')
+            return
+
+        delay = config['latency'] + random.uniform(0, config['jitter'])
+        if delay > 0:
+            time.sleep(delay)
+
+        roll = random.random()
+        if roll < config['throttle_rate']:
+            self.respond(429, 'text/plain', b'slow down', {'Retry-After': '1'})
+            return
+        if roll < config['throttle_rate'] + config['error_rate']:
+            self.respond(500, 'text/plain', b'server error')
+            return
+
+        content_type, body = page
+        if not config['repeat_urls']:
+            query = parse_qs(parts.query)
+            token = hashlib.blake2b(f"{query.get('q')}|{query.get('page')}".encode(), digest_size=6).hexdigest()
+            body = _LINK.sub(rf'\g<1>{token}/', body)
+        self.respond(200, content_type, body.encode('utf-8'))
+
+    def respond(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients killed mid-request (see crash_check) reset their connections
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def serve(connection, fixtures, config):
+    """Stand-in server process: report the bound port, serve until told to stop"""
+    pages = load_fixtures(fixtures)
+    server = StandInHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.pages = {slug: (content_type, body) for slug, content_type, body in pages.values()}
+    server.config = config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    connection.send(server.server_address[1])
+    connection.recv()
+    server.shutdown()
+
+class StandInServer:
+    """Runs serve() in a separate process so its CPU does not count as ours"""
+
+    def __init__(self, fixtures=FIXTURES, latency=0.05, jitter=0.02, error_rate=0.0,
+                 throttle_rate=0.0, repeat_urls=False):
+        self.fixtures = fixtures
+        self.config = {'latency': latency, 'jitter': jitter, 'error_rate': error_rate,
+                       'throttle_rate': throttle_rate, 'repeat_urls': repeat_urls}
+        self.process = None
+        self.connection = None
+        self.port = None
+
+    def __enter__(self):
+        context = multiprocessing.get_context('spawn')
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=serve, args=(child, self.fixtures, self.config), daemon=True)
+        self.process.start()
+        self.port = self.connection.recv()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connection.send('stop')
+        self.process.join(5)
+
+def bench_engines(search_engines, fixtures, port, rate, concurrency, max_pages=None, min_yield=None):
+    """Copy of search_engines pointed at the stand-in server"""
+    engines = {}
+    for engine_name, (slug, _, _) in load_fixtures(fixtures).items():
+        if engine_name not in search_engines:
+            continue
+        config = dict(search_engines[engine_name])
+        config['url'] = lambda dork, page=0, slug=slug: f"http://127.0.0.1:{port}/{slug}?q={dork}&page={page}"
+        config['rate'] = rate
+        config['burst'] = max(1, int(rate))
+        config['concurrency'] = concurrency
+        if max_pages:
+            config['max_pages'] = max_pages
+        if min_yield is not None:
+            config['min_yield'] = min_yield
+        engines[engine_name] = config
+    return engines
+
+def instrumented(backend_class):
+    """Subclass backend_class to time pages and the CPU spent per stage"""
+
+    class BenchEngine(backend_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.latencies = []
+            self.parse_cpu = 0.0
+            self.filter_cpu = 0.0
+            self.pages = 0
+            self.failed = 0
+            self.bench_lock = threading.Lock()
+            self.bench_local = threading.local()
+
+        def process_page(self, engine_name, dork, page, content):
+            started = time.thread_time()
+            self.bench_local.filter_cpu = 0.0
+            try:
+                return super().process_page(engine_name, dork, page, content)
+            finally:
+                # record_page already counted its own share as filter time
+                spent = time.thread_time() - started - self.bench_local.filter_cpu
+                with self.bench_lock:
+                    self.parse_cpu += spent
+
+        def record_page(self, engine_name, dork, page, found_urls):
+            started = time.thread_time()
+            try:
+                return super().record_page(engine_name, dork, page, found_urls)
+            finally:
+                spent = time.thread_time() - started
+                self.bench_local.filter_cpu = spent
+                with self.bench_lock:
+                    self.filter_cpu += spent
+
+        def finish_task(self, task, status, found, retry_after, new=None):
+            with self.bench_lock:
+                if found is None:
+                    self.failed += 1
+                else:
+                    self.pages += 1
+                    self.latencies.append(time.monotonic() - task.issued)
+            return super().finish_task(task, status, found, retry_after, new)
+
+    BenchEngine.__name__ = f"Bench{backend_class.__name__}"
+    return BenchEngine
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def rusage_cpu(who):
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime, usage.ru_maxrss
+
+def run_benchmark(backend='threads', dorks=100, engines=None, concurrency=20, max_pages=None,
+                  rate=1000.0, latency=0.05, jitter=0.02, error_rate=0.0, throttle_rate=0.0,
+                  repeat_urls=False, fixtures=FIXTURES, min_yield=None, **options):
+    """Run one benchmark and return the result dict that is saved as JSON"""
+    import dorkengine
+
+    with StandInServer(fixtures, latency, jitter, error_rate, throttle_rate, repeat_urls) as server:
+        search_engines = bench_engines(dorkengine.SEARCH_ENGINES, fixtures, server.port, rate,
+                                       concurrency, max_pages, min_yield)
+        selected = engines or list(search_engines)
+        dork_list = [f"bench dork {i}" for i in range(dorks)]
+
+        cpu_before, _ = rusage_cpu(resource.RUSAGE_SELF)
+        children_before, _ = rusage_cpu(resource.RUSAGE_CHILDREN)
+        started = time.perf_counter()
+        # Progress dicts are consumed as they arrive, like a real caller, so they do not pile up in peak RSS
+        engine = dorkengine.run(dork_list, selected, concurrency, on_result=lambda result: None,
+                                backend=instrumented(dorkengine.ENGINE_BACKENDS[backend]),
+                                search_engines=search_engines, **options)
+        elapsed = time.perf_counter() - started
+
+        # Parser processes are reaped by now; the server is still up
+        cpu_after, peak_rss = rusage_cpu(resource.RUSAGE_SELF)
+        children_after, children_rss = rusage_cpu(resource.RUSAGE_CHILDREN)
+
+    process_cpu = cpu_after - cpu_before
+    parse_cpu = engine.parse_cpu + (children_after - children_before)
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'config': {
+            'backend': backend, 'dorks': dorks, 'engines': selected, 'concurrency': concurrency,
+            'max_pages': max_pages, 'min_yield': min_yield, 'rate': rate, 'latency': latency, 'jitter': jitter,
+            'error_rate': error_rate, 'throttle_rate': throttle_rate, 'repeat_urls': repeat_urls,
+            'extractor': os.environ.get('DORK_EXTRACTOR') or dorkengine.available_backends()[0],
+            'options': {key: value for key, value in options.items() if value is not None},
+            'python': sys.version.split()[0]
+        },
+        'elapsed': elapsed,
+        'pages': engine.pages,
+        'failed_tasks': engine.failed,
+        'valid_urls': engine.valid_count,
+        'pages_per_sec': engine.pages / elapsed if elapsed else 0.0,
+        'urls_per_sec': engine.valid_count / elapsed if elapsed else 0.0,
+        'latency_p50': percentile(engine.latencies, 0.50),
+        'latency_p99': percentile(engine.latencies, 0.99),
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': peak_rss / 1024,
+        'peak_child_rss_mb': children_rss / 1024,
+        'cpu': {
+            'fetch': max(0.0, process_cpu - engine.parse_cpu - engine.filter_cpu),
+            'parse': parse_cpu,
+            'filter': engine.filter_cpu
+        },
+        'filter_reasons': dict(engine.filter_stats()[0]),
+        'yield_curves': engine.scheduler.yield_curves()
+    }
+
+# metric -> True if higher is better
+COMPARED = {'pages_per_sec': True, 'urls_per_sec': True, 'latency_p50': False, 'latency_p99': False}
+
+def compare(result, baseline, tolerance):
+    """Return a list of (metric, old, new, change, regressed) rows"""
+    rows = []
+    for metric, higher_is_better in COMPARED.items():
+        old, new = baseline.get(metric), result.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        regressed = change < -tolerance if higher_is_better else change > tolerance
+        rows.append((metric, old, new, change, regressed))
+    return rows
+
+def print_result(result):
+    cpu = result['cpu']
+    p50 = result['latency_p50'] or 0.0
+    p99 = result['latency_p99'] or 0.0
+    print(f"{result['config']['backend']}: {result['pages']} pages, {result['valid_urls']} valid URLs "
+          f"in {result['elapsed']:.2f}s ({result['failed_tasks']} failed tasks)")
+    print(f"  pages/sec {result['pages_per_sec']:.1f} | URLs/sec {result['urls_per_sec']:.1f} | "
+          f"latency p50 {p50 * 1000:.1f} ms p99 {p99 * 1000:.1f} ms")
+    print(f"  peak RSS {result['peak_rss_mb']:.1f} MB (children {result['peak_child_rss_mb']:.1f} MB) | "
+          f"CPU fetch {cpu['fetch']:.2f}s parse {cpu['parse']:.2f}s filter {cpu['filter']:.2f}s")
+
+# name -> (code run in a fresh interpreter, heavy modules it may load)
+STARTUP_CASES = {
+    'python': ('pass', ()),
+    'import dorkengine': ('import dorkengine', ()),
+    'dorkengine --list-engines': ("import dorkengine; dorkengine.main(['--list-engines'])", ()),
+    'import dorkparser': ('import dorkparser', ('tkinter',))
+}
+# Modules that only a running search needs
+HEAVY_MODULES = ('requests', 'aiohttp', 'asyncio', 'bs4', 'lxml', 'selectolax', 'orjson',
+                 'multiprocessing', 'concurrent.futures', 'http.server', 'tkinter')
+
+def bench_startup(repeat=10):
+    """{case: {'median', 'min', 'heavy'}}: wall seconds to run each STARTUP_CASES snippet"""
+    report = "import sys; sys.stderr.write(' '.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    directory = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for name, (code, _) in STARTUP_CASES.items():
+        command = [sys.executable, '-c', f"{code}\n{report}"]
+        # The first run compiles and caches the bytecode, which is not a cold start
+        heavy = subprocess.run(command, cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               text=True, check=True).stderr.split()
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run(command, cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            times.append(time.perf_counter() - started)
+        results[name] = {'median': percentile(times, 0.5), 'min': min(times), 'heavy': heavy}
+    return results
+
+def print_startup(results):
+    """Print the startup table, return the cases that loaded modules they should not"""
+    baseline = results['python']['median']
+    eager = []
+    for name, result in results.items():
+        unexpected = [module for module in result['heavy'] if module not in STARTUP_CASES[name][1]]
+        if unexpected:
+            eager.append(name)
+        print(f"{name:<28} {result['median'] * 1000:7.1f} ms (min {result['min'] * 1000:6.1f}, "
+              f"+{(result['median'] - baseline) * 1000:6.1f} over python)"
+              f"{'  loads ' + ', '.join(unexpected) if unexpected else ''}")
+    return eager
+
+def read_urls(path):
+    """URLs of a gzip result file, and the error that stopped reading it (None if it read cleanly)"""
+    import gzip
+    import zlib
+    data = bytearray()
+    try:
+        with gzip.open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                data += chunk
+    except (OSError, EOFError, zlib.error) as e:
+        return data.decode('utf-8', 'replace').split(), e
+    return data.decode('utf-8').split(), None
+
+def crash_check(kills=3, dorks=400, max_pages=3, concurrency=20, latency=0.01, engine='Bing', fixtures=FIXTURES):
+    """Compare an uninterrupted CLI run with one killed kills times and resumed.
+
+    Both write to a .gz file with a journal. Returns {name: {'lines',
+    'unique', 'error'}} for 'reference' and 'resumed', plus 'missing', the
+    reference URLs the resumed file lacks.
+    """
+    from dorkplugins import BUILTIN_ENGINES
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dorkengine.py')
+    with StandInServer(fixtures, latency, jitter=latency) as server, tempfile.TemporaryDirectory() as directory:
+        spec = dict(BUILTIN_ENGINES[engine], url=f"http://127.0.0.1:{server.port}/{engine_slug(engine)}"
+                                                 "?q={dork}&page={page}",
+                    max_pages=max_pages, rate=1000.0, burst=1000, concurrency=concurrency)
+        spec.pop('pagination', None)
+        config = os.path.join(directory, 'engines.json')
+        with open(config, 'w', encoding='utf-8') as f:
+            json.dump({engine: spec}, f)
+        dork_file = os.path.join(directory, 'dorks.txt')
+        with open(dork_file, 'w', encoding='utf-8') as f:
+            f.writelines(f"crash dork {i}\n" for i in range(dorks))
+
+        report = {}
+        found = {}
+        duration = None
+        for name, attempts in (('reference', 0), ('resumed', kills)):
+            output = os.path.join(directory, f"{name}.txt.gz")
+            command = [sys.executable, script, '--engines-config', config, '-e', engine, '-d', dork_file,
+                       '-c', str(concurrency), '-o', output, '-j', os.path.join(directory, f"{name}.db"), '-q']
+            started = time.monotonic()
+            for attempt in range(attempts + 1):
+                process = subprocess.Popen(command, stderr=subprocess.DEVNULL)
+                if attempt < attempts:
+                    # Somewhere in the middle of what is left to do
+                    try:
+                        process.wait(random.uniform(0.2, 0.6) * duration)
+                    except subprocess.TimeoutExpired:
+                        process.send_signal(signal.SIGKILL)
+                process.wait()
+            if duration is None:
+                duration = time.monotonic() - started
+            urls, error = read_urls(output)
+            found[name] = set(urls)
+            report[name] = {'lines': len(urls), 'unique': len(found[name]), 'error': error}
+        report['missing'] = len(found['reference'] - found['resumed'])
+    return report
+
+def print_crash(report):
+    """Print the crash check, return True if the resumed run lost or garbled output"""
+    for name in ('reference', 'resumed'):
+        result = report[name]
+        print(f"{name:<10} {result['lines']:8} lines {result['unique']:8} unique "
+              f"{result['lines'] - result['unique']:6} duplicates"
+              f"{'  unreadable: ' + str(result['error']) if result['error'] else ''}")
+    print(f"missing    {report['missing']:8} URLs of the reference run")
+    return bool(report['missing'] or report['resumed']['error'] or report['reference']['error'])
+
+def main(argv=None):
+    import dorkengine
+
+    parser = argparse.ArgumentParser(description="Benchmark an engine backend against a local stand-in server.")
+    parser.add_argument('-b', '--backend', choices=sorted(dorkengine.ENGINE_BACKENDS), default='threads')
+    parser.add_argument('-n', '--dorks', type=int, default=100, help="number of generated dorks (default: 100)")
+    parser.add_argument('-e', '--engine', action='append', dest='engines',
+                        help="engine to include, may be repeated (default: all with fixtures)")
+    parser.add_argument('-c', '--concurrency', type=int, default=20, help="workers (default: 20)")
+    parser.add_argument('--max-pages', type=int, help="override every engine's max_pages")
+    parser.add_argument('--min-yield', type=float, help="override every engine's min_yield (0 disables)")
+    parser.add_argument('--rate', type=float, default=1000.0, help="requests/sec allowed per engine (default: 1000)")
+    parser.add_argument('--latency', type=float, default=50.0, help="server latency in ms (default: 50)")
+    parser.add_argument('--jitter', type=float, default=20.0, help="extra random latency in ms (default: 20)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument('--repeat-urls', action='store_true', help="serve the same links for every page")
+    parser.add_argument('--parse-workers', type=int, help="parser processes (pipeline backend)")
+    parser.add_argument('--extractor', choices=list(dorkengine.EXTRACTOR_BACKENDS), help="HTML extraction backend")
+    parser.add_argument('--fixtures', default=FIXTURES, help="fixture directory (default: fixtures/serp)")
+    parser.add_argument('-o', '--output', help="JSON result file (default: bench_<timestamp>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier JSON result to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="allowed relative regression for --compare (default: 0.10)")
+    parser.add_argument('--startup', action='store_true',
+                        help="time cold starts and check nothing heavy is imported eagerly, then exit")
+    parser.add_argument('--repeat', type=int, default=10, help="runs per --startup case (default: 10)")
+    parser.add_argument('--crash', action='store_true',
+                        help="kill and resume a journaled run to a .gz file, check nothing is lost, then exit")
+    parser.add_argument('--kills', type=int, default=3, help="SIGKILLs per --crash run (default: 3)")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        return 1 if print_startup(bench_startup(args.repeat)) else 0
+    if args.crash:
+        engine = (args.engines or ['Bing'])[0]
+        return 1 if print_crash(crash_check(args.kills, args.dorks, args.max_pages or 3, args.concurrency,
+                                            args.latency / 1000, engine, args.fixtures)) else 0
+
+    if args.extractor:
+        dorkengine.set_default_backend(args.extractor)
+    options = {}
+    if args.backend == 'pipeline':
+        options['parse_workers'] = args.parse_workers
+
+    result = run_benchmark(args.backend, args.dorks, args.engines, args.concurrency, args.max_pages,
+                           args.rate, args.latency / 1000, args.jitter / 1000, args.error_rate,
+                           args.throttle_rate, args.repeat_urls, args.fixtures, args.min_yield, **options)
+    print_result(result)
+
+    output = args.output or f"bench_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressed = False
+        for metric, old, new, change, worse in compare(result, baseline, args.tolerance):
+            regressed |= worse
+            print(f"  {metric:<14} {old:10.4f} -> {new:10.4f} ({change:+.1%}){'  REGRESSION' if worse else ''}")
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""On-disk cache of search result pages.
+
+Bodies of successful fetches are stored zlib-compressed in a SQLite file,
+keyed by the SHA-256 of the final request URL each engine's url builder
+produced, so re-running a dork list (or an overlapping one) within the TTL
+costs no requests. Entries older than ttl seconds are treated as missing,
+and once the bodies exceed max_bytes the least recently used entries are
+evicted.
+
+    python dorkengine.py -d dorks.txt -e Bing --cache serp-cache.db --cache-ttl 12
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key BLOB PRIMARY KEY,
+    url TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at);
+"""
+
+def cache_key(url):
+    return hashlib.sha256(url.encode('utf-8')).digest()
+
+class ResponseCache:
+    """Thread-safe TTL + LRU page cache"""
+
+    def __init__(self, path, ttl=86400, max_bytes=512 * 1024 * 1024, level=6):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.level = level
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # A lost write only costs a refetch
+        self.db.execute("PRAGMA synchronous=OFF")
+        self.db.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.expired = 0
+        self.evictions = 0
+        self.purge()
+        self.total_bytes = self.db.execute("SELECT coalesce(sum(size), 0) FROM pages").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def purge(self):
+        """Drop every expired entry"""
+        with self.lock:
+            cursor = self.db.execute("DELETE FROM pages WHERE stored_at < ?", (time.time() - self.ttl,))
+            self.expired += cursor.rowcount
+            self.total_bytes = self.db.execute("SELECT coalesce(sum(size), 0) FROM pages").fetchone()[0]
+
+    def contains(self, url):
+        """True if a fresh entry exists; does not count as a hit or refresh it"""
+        with self.lock:
+            row = self.db.execute("SELECT stored_at FROM pages WHERE key = ?", (cache_key(url),)).fetchone()
+        return row is not None and row[0] >= time.time() - self.ttl
+
+    def get(self, url):
+        """Return the cached body for url, or None"""
+        key = cache_key(url)
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT body, size, stored_at FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            body, size, stored_at = row
+            if stored_at < now - self.ttl:
+                self.db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.db.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return zlib.decompress(body).decode('utf-8')
+
+    def put(self, url, content):
+        body = zlib.compress(content.encode('utf-8'), self.level)
+        key = cache_key(url)
+        now = time.time()
+        with self.lock:
+            old = self.db.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+            self.db.execute("INSERT OR REPLACE INTO pages (key, url, body, size, stored_at, accessed_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?)", (key, url, body, len(body), now, now))
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            self.stores += 1
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Caller must hold the lock; evict down to 90% so we do not evict on every put
+        target = self.max_bytes * 0.9
+        while self.total_bytes > target:
+            rows = self.db.execute("SELECT key, size FROM pages ORDER BY accessed_at LIMIT 100").fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            for key, size in rows:
+                self.db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.evictions += 1
+                if self.total_bytes <= target:
+                    return
+
+    def stats(self):
+        with self.lock:
+            entries = self.db.execute("SELECT count(*) FROM pages").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0,
+                    'stores': self.stores, 'expired': self.expired, 'evictions': self.evictions,
+                    'entries': entries, 'bytes': self.total_bytes}
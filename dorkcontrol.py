@@ -0,0 +1,103 @@
+"""Run state for DorkEngine: running, paused, draining, stopped.
+
+RunController replaces the flag-and-sleep loops the workers, the GUI and
+the command line used to poll. Every transition happens under one
+Condition and is pushed to listeners, so pause, resume and stop take
+effect at once and nothing wakes up while there is nothing to do:
+
+    running  --pause()-->  paused  --resume()-->  running
+    running/paused  --stop()-->  draining  --last worker exits-->  stopped
+    running  --last worker exits (all work done)-->  stopped
+
+While draining no new tasks are handed out, but tasks already in flight
+are fetched, parsed and recorded before the run counts as stopped.
+"""
+import threading
+import time
+
+RUNNING = 'running'
+PAUSED = 'paused'
+DRAINING = 'draining'
+STOPPED = 'stopped'
+
+class RunController:
+    """Thread-safe run state shared by an engine's workers and its owner.
+
+    Listeners are called with the new state after every transition, from
+    whichever thread caused it, and must not block.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.state = STOPPED
+        self.workers = 0
+        self.listeners = []
+
+    def _set(self, state):
+        # Caller must hold the condition lock
+        self.state = state
+        self.condition.notify_all()
+        for listener in list(self.listeners):
+            listener(state)
+
+    def start(self):
+        """Enter the running state.
+
+        The caller counts as a worker until it calls worker_exited(), so the
+        run cannot stop before all of its workers have been added.
+        """
+        with self.condition:
+            if self.state != STOPPED:
+                raise RuntimeError(f"Run already {self.state}")
+            self.workers = 1
+            self._set(RUNNING)
+
+    def add_worker(self):
+        with self.condition:
+            self.workers += 1
+
+    def worker_exited(self):
+        """Called once by every registered worker when it returns"""
+        with self.condition:
+            self.workers -= 1
+            if self.workers <= 0 and self.state != STOPPED:
+                self._set(STOPPED)
+
+    def pause(self):
+        with self.condition:
+            if self.state == RUNNING:
+                self._set(PAUSED)
+
+    def resume(self):
+        with self.condition:
+            if self.state == PAUSED:
+                self._set(RUNNING)
+
+    def stop(self):
+        """Stop handing out work; in-flight tasks still finish"""
+        with self.condition:
+            if self.state in (RUNNING, PAUSED):
+                self._set(DRAINING)
+
+    @property
+    def is_running(self):
+        return self.state in (RUNNING, PAUSED)
+
+    @property
+    def is_paused(self):
+        return self.state == PAUSED
+
+    @property
+    def is_stopped(self):
+        return self.state == STOPPED
+
+    def wait(self, timeout=None):
+        """Block until the run has stopped, return True if it has"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.state != STOPPED:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
@@ -0,0 +1,1255 @@
+"""Headless scraping engine for DorkParser.
+
+This module holds everything that does not need a display: the search
+engine table, the page parsers, URL filtering and the worker pool. It never
+imports tkinter, so it can be used from scripts, servers and the command line:
+
+    python dorkengine.py -d dorks.txt -e Bing -e Yahoo -c 20 -o results.txt
+
+The network stack (requests, aiohttp, asyncio) and the process pool are
+imported by the backend that uses them when a run starts, and HTML parser
+libraries when an engine first parses a page, so importing this module or
+running --list-engines stays fast (python dorkbench.py --startup).
+"""
+import argparse
+import threading
+from datetime import datetime
+import queue
+import sys
+import time
+import random
+import hashlib
+from collections import Counter, deque
+from functools import partial
+import os
+from dorkextract import set_default_backend, available_backends, BACKENDS as EXTRACTOR_BACKENDS
+from dorksink import ResultSink, FORMATS, guess_format
+from dorkjournal import Journal
+from dorkcache import ResponseCache
+from dorksource import DorkSource
+from dorkstore import ResultStore
+from dorkmetrics import Metrics, MetricsServer
+from dorkplugins import default_registry, ENV_CONFIG
+from dorkprofile import StageProfiler, profiled, PROFILE_OPTIONS
+from dorkcontrol import RunController, PAUSED, RUNNING, DRAINING, STOPPED
+from dorkscheduler import RateScheduler, THROTTLE_STATUSES, RETRY, DONE, parse_retry_after
+from urllib.parse import quote_plus, urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Search engine domains and other unwanted hosts (subdomains are excluded too)
+DEFAULT_EXCLUDED_DOMAINS = [
+    'google.com', 'bing.com', 'yahoo.com', 'duckduckgo.com', 'aol.com',
+    'yandex.com', 'naver.com', 'youtube.com', 'facebook.com', 'twitter.com',
+    'instagram.com', 'linkedin.com', 'pinterest.com'
+]
+
+def normalize_url(url):
+    """Return a canonical form of url used as the dedup key"""
+    try:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or '').rstrip('.')
+        port = parts.port
+    except ValueError:
+        return url.strip()
+        
+    netloc = f"[{host}]" if ':' in host else host
+    if parts.username is not None:
+        userinfo = parts.username
+        if parts.password is not None:
+            userinfo += ':' + parts.password
+        netloc = f"{userinfo}@{netloc}"
+    if port is not None and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{netloc}:{port}"
+        
+    path = parts.path.rstrip('/')
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    
+    # Fragment is dropped on purpose
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+class DomainExcluder:
+    """Host based exclusion list matched by domain suffix.
+    
+    A host is excluded when it equals a listed domain or is a subdomain of
+    one, so 'bing.com' drops 'www.bing.com' but not 'notbing.com'. Lookups
+    walk the host labels against a set, so the cost per URL does not depend
+    on the size of the list.
+    """
+    
+    def __init__(self, domains=DEFAULT_EXCLUDED_DOMAINS):
+        self.domains = set()
+        self.update(domains)
+        
+    @staticmethod
+    def _clean(domain):
+        domain = domain.split('#', 1)[0].strip().lower().strip('.')
+        if domain.startswith('*.'):
+            domain = domain[2:]
+        return domain
+        
+    def update(self, domains):
+        for domain in domains:
+            domain = self._clean(domain)
+            if domain:
+                self.domains.add(domain)
+                
+    def load_file(self, path):
+        """Add domains from a file with one domain per line, return the count read"""
+        before = len(self.domains)
+        with open(path, 'r', encoding='utf-8') as f:
+            self.update(f)
+        return len(self.domains) - before
+        
+    def match(self, host):
+        """Return the listed domain covering host, or None"""
+        host = host.lower().rstrip('.')
+        if host in self.domains:
+            return host
+        index = host.find('.')
+        while index != -1:
+            suffix = host[index + 1:]
+            if suffix in self.domains:
+                return suffix
+            index = host.find('.', index + 1)
+        return None
+
+class URLIndex:
+    """Thread-safe set of normalized URLs shared by all workers.
+    
+    Keys are kept as normalized strings until max_exact entries, after which
+    the index switches to 64-bit fingerprints so memory stays bounded on very
+    long runs (at the cost of a negligible false-positive rate).
+    """
+    
+    def __init__(self, max_exact=1000000, compact=False):
+        self.max_exact = max_exact
+        self.compact = compact
+        self._start_compact = compact
+        self._keys = set()
+        self._lock = threading.Lock()
+        
+    @staticmethod
+    def fingerprint(key):
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8', 'surrogatepass'), digest_size=8).digest(), 'big')
+        
+    def _key(self, url):
+        key = normalize_url(url)
+        return self.fingerprint(key) if self.compact else key
+        
+    def _compact(self):
+        # Caller must hold the lock
+        self._keys = {self.fingerprint(key) for key in self._keys}
+        self.compact = True
+        
+    def add(self, url):
+        """Add url to the index, return True if it was not seen before"""
+        with self._lock:
+            key = self._key(url)
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            if not self.compact and len(self._keys) > self.max_exact:
+                self._compact()
+            return True
+            
+    def add_normalized(self, key):
+        """Add a key already produced by normalize_url (e.g. restored from a journal)"""
+        with self._lock:
+            self._keys.add(self.fingerprint(key) if self.compact else key)
+            if not self.compact and len(self._keys) > self.max_exact:
+                self._compact()
+                
+    def __contains__(self, url):
+        with self._lock:
+            return self._key(url) in self._keys
+            
+    def __len__(self):
+        return len(self._keys)
+        
+    def clear(self):
+        with self._lock:
+            self._keys = set()
+            self.compact = self._start_compact
+
+# Headers with different user agents
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/91.0.864.59'
+]
+
+def get_random_user_agent():
+    return {'User-Agent': random.choice(USER_AGENTS),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Referer': 'https://www.google.com/',
+            'DNT': '1',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1'}
+
+# Engine name -> config ('url', 'parser', 'max_pages' and rate limits),
+# built from declarative specs on first use; see dorkplugins
+SEARCH_ENGINES = default_registry()
+
+class DorkEngine:
+    """Runs dorks against the selected search engines on a pool of worker threads.
+    
+    Progress is reported as dicts on results_queue (one per fetched page or
+    error), which is what the GUI and the command line both consume. With a
+    sink (see dorksink.ResultSink) valid URLs are streamed to it as pages
+    complete and valid_urls stays empty; without one they are collected in
+    valid_urls, a plain list, or with compact_results a dorkstore.ResultStore
+    (less memory, slower to fill and export, see there; pass a store to
+    keep hold of it). save_results() can write them grouped by host, from
+    either. valid_count is kept either way. max_per_host caps the URLs any
+    one host contributes, with or without a sink; the per-host counts take
+    one short lock per page.
+    With a journal (see dorkjournal.Journal) finished pages and the dedup
+    state are checkpointed and a restarted run continues where the journal
+    left off. With a cache (see dorkcache.ResponseCache) pages fetched
+    recently are served from disk without a request or a rate-limit wait.
+    max_pending caps the tasks queued ahead of the workers, and so how far
+    ahead dorks are read.
+    
+    Counters live in a dorkmetrics.Metrics registry, one shard per worker
+    thread, and are summed only when read (valid_count, engine_stats,
+    snapshot(), metrics.snapshot()).
+    """
+    
+    def __init__(self, search_engines=None, excluder=None, sink=None, journal=None, cache=None,
+                 max_pending=1000, metrics=None, max_per_host=None, compact_results=False):
+        self.search_engines = search_engines if search_engines is not None else SEARCH_ENGINES
+        self.excluder = excluder if excluder is not None else DomainExcluder()
+        self.sink = sink
+        self.journal = journal
+        self.cache = cache
+        self.max_pending = max_pending
+        self.metrics = metrics if metrics is not None else Metrics()
+        
+        # Run state; workers block on the scheduler, never on sleep loops
+        self.control = RunController()
+        self.control.listeners.append(self.on_state)
+        
+        # Variables
+        if isinstance(compact_results, ResultStore):
+            self.valid_urls = compact_results
+        else:
+            self.valid_urls = ResultStore() if compact_results else []
+        self.host_caps = ResultStore(max_per_host, keep_urls=False) if max_per_host is not None else None
+        self.url_index = URLIndex()
+        self.current_dork_index = 0
+        self.dork_source = None
+        self._dork_buffer = deque()
+        # (engine, dork, page) -> URL keys a recorded page added, until finish_task journals them
+        self._page_keys = {}
+        self.results_queue = queue.Queue()
+        self.active_threads = []
+        self.scheduler = None
+        self._local = threading.local()
+        
+    def start(self, dorks, selected_engines, concurrency=10):
+        """Launch the workers and return immediately.
+        
+        dorks is a dorksource.DorkSource or any iterable of dork strings; it
+        is read lazily, in chunks, as the scheduler needs more work.
+        """
+        unknown = [engine for engine in selected_engines if engine not in self.search_engines]
+        if unknown:
+            raise ValueError(f"Unknown search engine(s): {', '.join(unknown)}")
+            
+        # Reset variables
+        self.valid_urls.clear()
+        if self.host_caps is not None:
+            self.host_caps.clear()
+        self.metrics.reset()
+        self.url_index.clear()
+        self.current_dork_index = 0
+        self.dork_source = dorks if isinstance(dorks, DorkSource) else DorkSource.from_iterable(dorks)
+        self._dork_buffer.clear()
+        
+        # Continue from the journal's checkpoint, if any
+        start_page = retry_pages = None
+        if self.journal is not None:
+            self.journal.begin(selected_engines)
+            for key in self.journal.seen_keys():
+                self.url_index.add_normalized(key)
+            start_page = self.journal.next_page
+            retry_pages = self.journal.failed_pages
+            # Journal writes wait for the sink (see checkpoint), and are committed as soon as they are made
+            if self.sink is not None and self.journal.commit not in self.sink.after_sync:
+                self.sink.after_sync.append(self.journal.commit)
+            
+        self.active_threads = []
+        is_cached = None
+        if self.cache is not None:
+            is_cached = lambda task: self.cache.contains(self.task_url(task))
+        self.scheduler = RateScheduler(self.search_engines, list(selected_engines),
+                                       self.next_dork, max_pending=self.max_pending,
+                                       start_page=start_page, is_cached=is_cached, retry_pages=retry_pages)
+        self.register_gauges()
+        self.control.start()
+        try:
+            self.launch(max(1, int(concurrency)))
+        finally:
+            self.control.worker_exited()
+        
+    def register_gauges(self):
+        scheduler = self.scheduler
+        self.metrics.gauge('pending_tasks', lambda: {name: lane['pending'] for name, lane in scheduler.stats().items()})
+        self.metrics.gauge('in_flight_tasks', lambda: {name: lane['in_flight'] for name, lane in scheduler.stats().items()})
+        self.metrics.gauge('results_queue_depth', self.results_queue.qsize)
+        
+    def launch(self, concurrency):
+        # Launch worker threads
+        for _ in range(concurrency):
+            self._spawn(self.worker)
+            
+    def _spawn(self, target, *args):
+        """Start a worker thread the run waits for before it counts as stopped"""
+        self.control.add_worker()
+        thread = threading.Thread(target=self._run_worker, args=(target,) + args, daemon=True)
+        thread.start()
+        self.active_threads.append(thread)
+        return thread
+        
+    def _run_worker(self, target, *args):
+        try:
+            target(*args)
+        finally:
+            self.control.worker_exited()
+            
+    def on_state(self, state):
+        """Follow run state changes; called with the controller's lock held"""
+        if self.scheduler is not None:
+            if state == PAUSED:
+                self.scheduler.pause()
+            elif state == RUNNING:
+                self.scheduler.resume()
+            elif state == DRAINING:
+                self.scheduler.close()
+        if state == STOPPED:
+            # Release the dork file if the run was stopped early
+            if self.dork_source is not None:
+                self.dork_source.close()
+            # Every in-flight page is recorded by now
+            if self.journal is not None:
+                self.checkpoint(self.journal.commit)
+            
+    @property
+    def is_running(self):
+        return self.control.is_running
+        
+    @property
+    def is_paused(self):
+        return self.control.is_paused
+        
+    def pause(self):
+        self.control.pause()
+        
+    def resume(self):
+        self.control.resume()
+        
+    def stop(self):
+        """Hand out no more tasks; in-flight ones still finish (see join)"""
+        self.control.stop()
+        
+    def is_alive(self):
+        return not self.control.is_stopped
+        
+    def join(self, timeout=None):
+        """Wait for the workers, return True once they have all exited"""
+        return self.control.wait(timeout)
+        
+    def next_dork(self):
+        """Claim the next dork, or None when all dorks are taken.
+        
+        Only the scheduler calls this, with its lock held, so the buffer
+        needs no lock of its own.
+        """
+        if not self._dork_buffer:
+            self._dork_buffer.extend(self.dork_source.next_chunk())
+            if not self._dork_buffer:
+                return None
+        self.current_dork_index += 1
+        return self._dork_buffer.popleft()
+        
+    def get_session(self):
+        """Return this thread's requests.Session so connections are reused"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+        return session
+        
+    def process_page(self, engine_name, dork, page, content):
+        """Parse and filter one fetched page, return (links found, new valid URLs)"""
+        # Parse results using engine-specific parser
+        started = time.perf_counter()
+        found_urls = self.search_engines[engine_name]['parser'](content)
+        self.metrics.local().observe('parse', engine_name, time.perf_counter() - started)
+        return self.record_page(engine_name, dork, page, found_urls)
+        
+    def record_page(self, engine_name, dork, page, found_urls):
+        """Filter the links parsed from one page, return (links found, new valid URLs)"""
+        # Filter and validate URLs
+        started = time.perf_counter()
+        valid_found = self.filter_urls(found_urls, engine_name)
+        
+        # Drop URLs from hosts that are at their cap
+        stats = self.metrics.local()
+        if self.host_caps is not None:
+            accepted = self.host_caps.extend(valid_found)
+            if len(accepted) != len(valid_found):
+                stats.count(('capped', engine_name), len(valid_found) - len(accepted))
+                valid_found = accepted
+        if self.sink is None:
+            # list.extend is atomic, so a plain list needs no lock
+            self.valid_urls.extend(valid_found)
+                
+        # Update this worker's stats; totals are merged when read
+        stats.count(('pages', engine_name))
+        stats.count(('links_found', engine_name), len(found_urls))
+        stats.count(('new_urls', engine_name), len(valid_found))
+        
+        # Stream to disk as we go
+        if self.sink is not None:
+            self.sink.write(valid_found, engine_name, dork, page + 1)
+        if self.journal is not None:
+            # Journaled together with the page by finish_task
+            self._page_keys[(engine_name, dork, page)] = [normalize_url(url) for url in valid_found]
+            
+        # Update queue
+        self.results_queue.put({
+            'engine': engine_name,
+            'dork': dork,
+            'total': len(found_urls),
+            'valid': len(valid_found),
+            'page': page + 1,
+            'urls': valid_found
+        })
+        stats.observe('filter', engine_name, time.perf_counter() - started)
+        return len(found_urls), len(valid_found)
+        
+    def report_error(self, engine_name, dork, error):
+        self.metrics.local().count(('errors', engine_name))
+        self.results_queue.put({
+            'engine': engine_name,
+            'dork': dork,
+            'error': str(error)
+        })
+        
+    def drain_results(self, limit=None):
+        """Take up to limit queued progress dicts without blocking"""
+        results = []
+        while limit is None or len(results) < limit:
+            try:
+                results.append(self.results_queue.get_nowait())
+            except queue.Empty:
+                break
+        return results
+        
+    def snapshot(self):
+        """Running totals for the whole run"""
+        totals = self.metrics.totals()
+        return {'total': totals['links_found'], 'valid': totals['new_urls'], 'errors': totals['errors']}
+        
+    @property
+    def valid_count(self):
+        return self.metrics.totals()['new_urls']
+        
+    @property
+    def engine_stats(self):
+        """{engine: {'total': links found, 'valid': new URLs}}"""
+        counters = self.metrics.counters()
+        return {engine: {'total': counters[('links_found', engine)], 'valid': counters[('new_urls', engine)]}
+                for engine in self.search_engines.keys()}
+                
+    def filter_stats(self):
+        """(URLs per filter outcome, excluded URLs per listed domain), merged from every worker"""
+        reasons = Counter()
+        domain_hits = Counter()
+        for key, value in self.metrics.counters().items():
+            if key[0] == 'filtered':
+                reasons[key[2]] += value
+            elif key[0] == 'excluded_domain':
+                domain_hits[key[2]] += value
+        return reasons, domain_hits
+        
+    def record_response(self, engine_name, status, size, started):
+        """Count one live response of size bytes (as received) in this worker's stats"""
+        stats = self.metrics.local()
+        stats.observe('fetch', engine_name, time.perf_counter() - started)
+        stats.count(('requests', engine_name))
+        stats.count(('status', engine_name, status))
+        stats.count(('response_bytes', engine_name), size)
+        
+    def yield_report(self):
+        """One line per engine: mean new URLs at each page and how often pagination stopped early"""
+        if self.scheduler is None:
+            return []
+        stats = self.scheduler.stats()
+        lines = []
+        for engine_name, curve in self.scheduler.yield_curves().items():
+            if not curve:
+                continue
+            points = ' '.join(f"p{point['page']}:{point['mean_new']:.1f}" for point in curve)
+            lines.append(f"{engine_name} new URLs per page - {points} - stopped early "
+                         f"{stats[engine_name]['stopped_early']}, pruned {stats[engine_name]['pruned']}")
+        return lines
+        
+    def metrics_report(self):
+        """One line per engine: requests by status, bytes, mean fetch time and duplicate rate"""
+        lines = []
+        for engine_name, entry in sorted(self.metrics.snapshot()['engines'].items()):
+            statuses = ' '.join(f"{status}:{count}" for status, count in sorted(entry['status'].items()))
+            fetch = entry.get('latency', {}).get('fetch')
+            mean = f", mean fetch {fetch['sum'] / fetch['count'] * 1000:.0f} ms" if fetch and fetch['count'] else ""
+            lines.append(f"{engine_name} - {entry.get('requests', 0)} requests ({statuses or 'none'}), "
+                         f"{entry.get('response_bytes', 0) / 1048576:.1f} MB{mean}, "
+                         f"{entry['dedup_hit_rate']:.0%} duplicate URLs"
+                         + (f", {entry['capped']} over the per-host cap" if entry.get('capped') else ""))
+        return lines
+        
+    def task_url(self, task):
+        return self.search_engines[task.engine]['url'](quote_plus(task.dork), task.page)
+        
+    def cached_page(self, url, engine_name=None):
+        if self.cache is None:
+            return None
+        content = self.cache.get(url)
+        if content is not None and engine_name is not None:
+            self.metrics.local().count(('cache_hits', engine_name))
+        return content
+        
+    def store_page(self, url, content):
+        if self.cache is not None:
+            self.cache.put(url, content)
+            
+    def fetch_page(self, url, engine_name=None):
+        """Return (status, text, retry_after) for url, from the cache when possible"""
+        content = self.cached_page(url, engine_name)
+        if content is not None:
+            return 200, content, None
+            
+        headers = get_random_user_agent()
+        started = time.perf_counter()
+        response = self.get_session().get(url, headers=headers, timeout=15)
+        if engine_name is not None:
+            self.record_response(engine_name, response.status_code, len(response.content), started)
+        if response.status_code == 200:
+            self.store_page(url, response.text)
+        return response.status_code, response.text, parse_retry_after(response.headers.get('Retry-After'))
+        
+    def finish_task(self, task, status, found, retry_after, new=None):
+        """Hand a task outcome back to the scheduler, return its RETRY/NEXT_PAGE/DONE verdict"""
+        if status in THROTTLE_STATUSES:
+            self.report_error(task.engine, task.dork, f"HTTP {status}, backing off {task.engine}")
+        outcome = self.scheduler.task_done(task, status, found, retry_after, new)
+        
+        # Checkpoint the page unless it will be retried or was cut short by stop
+        if self.journal is not None:
+            keys = self._page_keys.pop((task.engine, task.dork, task.page), ())
+            if outcome != RETRY and (found is not None or self.is_running):
+                self.checkpoint(self.journal.page_done, task.dork, task.engine, task.page, status, found,
+                                outcome == DONE, keys)
+        return outcome
+        
+    def checkpoint(self, write, *args):
+        """Run a journal write, with a sink only once the URLs reported before it are on disk.
+        
+        Otherwise a kill could leave a page journaled as done, and its URLs as
+        seen, while the URLs themselves never reached the result file.
+        """
+        if self.sink is None:
+            write(*args)
+        else:
+            self.sink.when_durable(partial(write, *args))
+        
+    def take_task(self):
+        """Block until the scheduler hands out a task; None when the run is over"""
+        return self.scheduler.get()
+        
+    def worker(self):
+        while True:
+            # Wait for the next task any engine's rate limit allows (blocks while paused)
+            task = self.take_task()
+            if task is None:
+                return
+                
+            status = found = new = retry_after = None
+            try:
+                # Get URL for this page
+                url = self.task_url(task)
+                
+                # Make request (or read it from the cache)
+                status, content, retry_after = self.fetch_page(url, task.engine)
+                
+                if status == 200:
+                    # Parse results using engine-specific parser
+                    found, new = self.process_page(task.engine, task.dork, task.page, content)
+                    
+            except Exception as e:
+                # Log error but continue
+                self.report_error(task.engine, task.dork, e)
+            finally:
+                self.finish_task(task, status, found, retry_after, new)
+
+    def filter_urls(self, urls, engine_name=None):
+        """Filter and validate URLs"""
+        reasons = Counter()
+        domain_hits = Counter()
+        valid_urls = []
+        for url in urls:
+            # Parse the host once per URL
+            try:
+                parts = urlsplit(url)
+                host = parts.hostname
+            except ValueError:
+                reasons['malformed'] += 1
+                continue
+                
+            # Basic URL validation
+            if parts.scheme.lower() not in ('http', 'https') or not host:
+                reasons['invalid'] += 1
+                continue
+                
+            # Skip URLs from excluded domains
+            domain = self.excluder.match(host)
+            if domain is not None:
+                reasons['excluded'] += 1
+                domain_hits[domain] += 1
+                continue
+                
+            # Add URL if no worker has seen it before (O(1), normalized)
+            if self.url_index.add(url):
+                reasons['accepted'] += 1
+                valid_urls.append(url)
+            else:
+                reasons['duplicate'] += 1
+                
+        # This worker's stats; the only shared lock on the way is the URL index's
+        stats = self.metrics.local()
+        for reason, count in reasons.items():
+            stats.count(('filtered', engine_name, reason), count)
+        for domain, count in domain_hits.items():
+            stats.count(('excluded_domain', engine_name, domain), count)
+        if engine_name is not None:
+            stats.count(('dedup_checks', engine_name), reasons['accepted'] + reasons['duplicate'])
+            stats.count(('dedup_hits', engine_name), reasons['duplicate'])
+        return valid_urls
+
+    def save_results(self, filename=None, group_by_host=False):
+        """Save valid URLs to a text file and return its name; group_by_host puts each host's URLs together"""
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            filename = f"results_{timestamp}.txt"
+            
+        store = self.valid_urls
+        if group_by_host and not isinstance(store, ResultStore):
+            # Only for its per-host index
+            store = ResultStore()
+            store.extend(self.valid_urls)
+        if isinstance(store, ResultStore):
+            store.export(filename, group_by_host)
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                for url in self.valid_urls:
+                    f.write(f"{url}\n")
+        return filename
+
+class AiohttpFetcher:
+    """Fetches pages over pooled keep-alive aiohttp connections"""
+    
+    def __init__(self, concurrency, per_host=None, timeout=15):
+        self.concurrency = concurrency
+        self.per_host = per_host or min(concurrency, 100)
+        self.timeout = timeout
+        self.session = None
+        
+    async def open(self):
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host,
+                                         keepalive_timeout=30, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        
+    async def fetch(self, url):
+        """Return (status, text, retry_after, body size in bytes) for url"""
+        async with self.session.get(url, headers=get_random_user_agent()) as response:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            # text() decodes the body read() keeps, so this reads it once
+            body = await response.read()
+            return response.status, await response.text(errors='replace'), retry_after, len(body)
+            
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
+class SessionPoolFetcher:
+    """Fallback fetcher used when aiohttp is not installed.
+    
+    Requests go through one pooled requests.Session per host on a small
+    thread pool, so only the blocking socket I/O occupies a thread; waits
+    between requests stay on the event loop.
+    """
+    
+    def __init__(self, concurrency, per_host=None, timeout=15):
+        self.max_workers = min(concurrency, 64)
+        self.per_host = per_host or self.max_workers
+        self.timeout = timeout
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.executor = None
+        
+    async def open(self):
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch')
+        
+    def _session(self, host):
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                import requests
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.sessions[host] = session
+        return session
+        
+    def _get(self, url):
+        session = self._session(urlsplit(url).netloc)
+        response = session.get(url, headers=get_random_user_agent(), timeout=self.timeout)
+        return (response.status_code, response.text, parse_retry_after(response.headers.get('Retry-After')),
+                len(response.content))
+        
+    async def fetch(self, url):
+        """Return (status, text, retry_after, body size in bytes) for url"""
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._get, url)
+        
+    async def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        for session in self.sessions.values():
+            session.close()
+        self.sessions = {}
+
+class AsyncDorkEngine(DorkEngine):
+    """DorkEngine running every worker as a coroutine on one event loop.
+    
+    concurrency is the number of in-flight page fetches and can be in the
+    thousands; the whole engine uses a single thread (plus a small fetch
+    pool when aiohttp is unavailable). Same interface as DorkEngine.
+    asyncio and the fetcher's HTTP library are imported when a run starts.
+    """
+    
+    def __init__(self, *args, fetcher_class=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetcher_class = fetcher_class
+        self.loop = None
+        self._wakeup = None
+        
+    def launch(self, concurrency):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        self._spawn(self.run_loop, concurrency)
+        
+    def run_loop(self, concurrency):
+        loop = self.loop
+        try:
+            loop.run_until_complete(self.main(concurrency))
+        finally:
+            # Release the selector and self-pipe before the run counts as stopped
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+                
+    def _call_soon(self, callback):
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(callback)
+            except RuntimeError:
+                # Loop already finished
+                pass
+                
+    async def main(self, concurrency):
+        import asyncio
+        if self.fetcher_class is None:
+            # Chosen (and aiohttp imported by open) on the loop thread, so a GUI calling start() does not wait
+            from importlib.util import find_spec
+            self.fetcher_class = AiohttpFetcher if find_spec('aiohttp') is not None else SessionPoolFetcher
+        self._wakeup = asyncio.Event()
+        # Scheduler changes (task done, resume, close) wake the waiting workers
+        self.scheduler.listeners.append(lambda: self._call_soon(self._wakeup.set))
+        fetcher = self.fetcher_class(concurrency)
+        await fetcher.open()
+        try:
+            await asyncio.gather(*[self.async_worker(fetcher) for _ in range(concurrency)],
+                                 return_exceptions=True)
+        finally:
+            await fetcher.close()
+            
+    async def next_task(self):
+        """Wait until the scheduler allows a task to run, None when finished or stopped"""
+        import asyncio
+        while True:
+            # Clear first so a wakeup between poll() and wait() is not lost
+            self._wakeup.clear()
+            task, delay = self.scheduler.poll()
+            if task is not None:
+                return task
+            if self.scheduler.is_finished():
+                return None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        
+    async def async_worker(self, fetcher):
+        while True:
+            task = await self.next_task()
+            if task is None:
+                return
+                
+            status = found = new = retry_after = None
+            try:
+                # Get URL for this page
+                url = self.task_url(task)
+                
+                content = self.cached_page(url, task.engine)
+                if content is not None:
+                    status = 200
+                else:
+                    started = time.perf_counter()
+                    status, content, retry_after, size = await fetcher.fetch(url)
+                    self.record_response(task.engine, status, size, started)
+                    if status == 200:
+                        self.store_page(url, content)
+                
+                if status == 200:
+                    # Parse results using engine-specific parser
+                    found, new = self.process_page(task.engine, task.dork, task.page, content)
+                    
+            except Exception as e:
+                # Log error but continue
+                self.report_error(task.engine, task.dork, e)
+            finally:
+                self.finish_task(task, status, found, retry_after, new)
+
+class PipelineDorkEngine(DorkEngine):
+    """DorkEngine split into fetch -> parse -> filter stages.
+    
+    Fetch threads (concurrency of them) hand pages to a pool of parser
+    processes through a bounded queue, and a single filter thread dedups,
+    records stats and reports the pages. Each stage is sized on its own and
+    a full queue blocks the stage in front of it, so backpressure reaches
+    the scheduler: a task counts as in flight until its page is filtered.
+    """
+    
+    def __init__(self, *args, parse_workers=None, queue_size=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.parse_workers = max(1, parse_workers or os.cpu_count() or 1)
+        self.queue_size = queue_size or self.parse_workers * 4
+        self.parse_queue = None
+        self.filter_queue = None
+        self.pool = None
+        self.inline_parsers = set()
+        
+    def launch(self, concurrency):
+        self.parse_queue = queue.Queue(self.queue_size)
+        self.filter_queue = queue.Queue(self.queue_size)
+        self.metrics.gauge('parse_queue_depth', self.parse_queue.qsize)
+        self.metrics.gauge('filter_queue_depth', self.filter_queue.qsize)
+        # spawn rather than fork: the parent already has threads running
+        import multiprocessing
+        import pickle
+        from concurrent.futures import ProcessPoolExecutor
+        self.pool = ProcessPoolExecutor(self.parse_workers, mp_context=multiprocessing.get_context('spawn'))
+        
+        # Parsers that cannot be sent to another process run in the parse threads
+        self.inline_parsers = set()
+        for engine_name in self.scheduler.lanes:
+            try:
+                pickle.dumps(self.search_engines[engine_name]['parser'])
+            except (pickle.PicklingError, AttributeError, TypeError):
+                self.inline_parsers.add(engine_name)
+                
+        fetchers = [self._spawn(self.fetch_stage) for _ in range(concurrency)]
+        # Two threads per process keep every parser process busy
+        parsers = [self._spawn(self.parse_stage) for _ in range(self.parse_workers * 2)]
+        self._spawn(self.filter_stage)
+        self._spawn(self.close_stages, fetchers, parsers)
+        
+    def close_stages(self, fetchers, parsers):
+        """Send end-of-stream markers down the pipeline as each stage finishes"""
+        for thread in fetchers:
+            thread.join()
+        for _ in parsers:
+            self.parse_queue.put(None)
+        for thread in parsers:
+            thread.join()
+        self.filter_queue.put(None)
+        # Every parse has returned by now, so this only reaps the processes
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        
+    def fetch_stage(self):
+        while True:
+            # Wait for the next task any engine's rate limit allows (blocks while paused)
+            task = self.take_task()
+            if task is None:
+                return
+                
+            status = retry_after = None
+            try:
+                # Get URL for this page
+                url = self.task_url(task)
+                
+                # Make request (or read it from the cache)
+                status, content, retry_after = self.fetch_page(url, task.engine)
+                
+                if status == 200:
+                    # Blocks while the parse stage is behind
+                    self.parse_queue.put((task, status, content, retry_after))
+                    continue
+                    
+            except Exception as e:
+                # Log error but continue
+                self.report_error(task.engine, task.dork, e)
+            self.finish_task(task, status, None, retry_after)
+            
+    def parse(self, engine_name, content):
+        parser = self.search_engines[engine_name]['parser']
+        if engine_name not in self.inline_parsers:
+            from concurrent.futures.process import BrokenProcessPool
+            try:
+                return self.pool.submit(parser, content).result()
+            except (BrokenProcessPool, RuntimeError):
+                # Pool is gone (shut down or a worker died), parse here instead
+                pass
+        return parser(content)
+        
+    def parse_stage(self):
+        while True:
+            item = self.parse_queue.get()
+            if item is None:
+                return
+                
+            task, status, content, retry_after = item
+            found_urls = None
+            try:
+                started = time.perf_counter()
+                found_urls = self.parse(task.engine, content)
+                self.metrics.local().observe('parse', task.engine, time.perf_counter() - started)
+            except Exception as e:
+                self.report_error(task.engine, task.dork, e)
+            self.filter_queue.put((task, status, found_urls, retry_after))
+            
+    def filter_stage(self):
+        while True:
+            item = self.filter_queue.get()
+            if item is None:
+                return
+                
+            task, status, found_urls, retry_after = item
+            found = new = None
+            try:
+                if found_urls is not None:
+                    found, new = self.record_page(task.engine, task.dork, task.page, found_urls)
+            except Exception as e:
+                self.report_error(task.engine, task.dork, e)
+            finally:
+                self.finish_task(task, status, found, retry_after, new)
+
+ENGINE_BACKENDS = {
+    'threads': DorkEngine,
+    'async': AsyncDorkEngine,
+    'pipeline': PipelineDorkEngine
+}
+
+def run(dorks, engines=None, concurrency=10, on_result=None, excluder=None, backend='threads',
+        search_engines=None, sink=None, journal=None, cache=None, **options):
+    """Run dorks to completion and return the finished engine.
+    
+    engines defaults to every configured search engine. on_result, if given,
+    is called from the calling thread with each progress dict as it arrives,
+    which is how results are streamed while the run is in progress. backend
+    picks the worker model from ENGINE_BACKENDS ('threads', 'async' or
+    'pipeline'), or is a DorkEngine subclass to use as is.
+    search_engines overrides the engine table, e.g. to change rate limits.
+    sink streams valid URLs to a ResultSink instead of keeping them in
+    memory; the caller closes it. journal checkpoints progress to a
+    dorkjournal.Journal so an interrupted run can be resumed, and cache
+    serves recently fetched pages from a dorkcache.ResponseCache. Any other
+    keyword options are passed to the backend's constructor, e.g. metrics,
+    a dorkmetrics.Metrics registry shared with a MetricsServer.
+    """
+    engine_class = backend if isinstance(backend, type) else ENGINE_BACKENDS[backend]
+    engine = engine_class(search_engines=search_engines, excluder=excluder, sink=sink,
+                          journal=journal, cache=cache, **options)
+    if engines is None:
+        engines = list(engine.search_engines.keys())
+        
+    # Marks the end of the results: the last worker has exited by the time it is queued
+    done = object()
+    def on_state(state):
+        if state == STOPPED:
+            engine.results_queue.put(done)
+    engine.control.listeners.append(on_state)
+    
+    engine.start(dorks, engines, concurrency)
+    try:
+        while True:
+            result = engine.results_queue.get()
+            if result is done:
+                break
+            if on_result is not None:
+                on_result(result)
+    finally:
+        # Let in-flight pages finish and be recorded before returning
+        engine.stop()
+        engine.join()
+        engine.control.listeners.remove(on_state)
+    return engine
+
+def export_grouped(store, path):
+    """Write a ResultStore's URLs grouped by host to path (.gz compressed, '-' for stdout)"""
+    if path == '-':
+        store.export(sys.stdout, group_by_host=True)
+        sys.stdout.flush()
+    elif path.endswith('.gz'):
+        import gzip
+        with gzip.open(path, 'wt', encoding='utf-8', errors='surrogatepass', newline='\n') as f:
+            store.export(f, group_by_host=True)
+    else:
+        store.export(path, group_by_host=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run search dorks without the GUI and stream valid URLs.")
+    parser.add_argument('-d', '--dorks', action='append',
+                        help="dork file, one per line, plain or gzip; may be repeated ('-' for stdin, the default)")
+    parser.add_argument('-e', '--engine', action='append', dest='engines',
+                        help="search engine to use, may be repeated (default: all)")
+    parser.add_argument('-c', '--concurrency', type=int, default=10, help="number of workers (default: 10)")
+    parser.add_argument('-r', '--rate', action='append', default=[], metavar='[ENGINE=]RPS',
+                        help="requests per second for one engine, or for all engines without ENGINE=")
+    parser.add_argument('--engine-concurrency', action='append', default=[], metavar='[ENGINE=]N',
+                        help="max in-flight requests for one engine, or for all engines without ENGINE=")
+    parser.add_argument('--max-per-host', type=int, metavar='N',
+                        help="keep at most N URLs from any one host (default: no cap)")
+    parser.add_argument('--group-by-host', action='store_true',
+                        help="keep URLs in memory and write them grouped by host when the run ends, "
+                             "instead of streaming them (text output, no --journal)")
+    parser.add_argument('--min-yield', action='append', default=[], metavar='[ENGINE=]N',
+                        help="stop paginating a dork once a page adds fewer than N new URLs "
+                             "(default: 1, 0 only stops on empty pages)")
+    parser.add_argument('-b', '--backend', choices=sorted(ENGINE_BACKENDS), default='threads',
+                        help="worker model: one thread per worker, or coroutines on one event loop (default: threads)")
+    parser.add_argument('--parse-workers', type=int,
+                        help="parser processes for the pipeline backend (default: CPU count)")
+    parser.add_argument('--queue-size', type=int,
+                        help="bound of the queues between pipeline stages (default: 4 per parser process)")
+    parser.add_argument('--extractor', choices=list(EXTRACTOR_BACKENDS),
+                        help="HTML extraction backend (default: fastest installed)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="append URLs to this file, .gz to compress ('-' for stdout, the default)")
+    parser.add_argument('-f', '--format', choices=FORMATS,
+                        help="output format (default: ndjson for .ndjson/.jsonl files, else text)")
+    parser.add_argument('-j', '--journal', metavar='PATH',
+                        help="SQLite checkpoint file; an existing one resumes the interrupted run")
+    parser.add_argument('--cache', metavar='PATH', help="SQLite cache of fetched result pages")
+    parser.add_argument('--cache-ttl', type=float, default=24.0, help="cache entry lifetime in hours (default: 24)")
+    parser.add_argument('--cache-size', type=int, default=512, help="cache size cap in MB (default: 512)")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="serve live metrics on http://HOST:PORT/metrics (Prometheus text) and /metrics.json")
+    parser.add_argument('--metrics-host', default='127.0.0.1', help="address for --metrics-port (default: 127.0.0.1)")
+    parser.add_argument('--profile', metavar='REPORT',
+                        help="time every stage per engine and write the breakdown here (.json for JSON)")
+    parser.add_argument('--profile-with', action='append', default=[], choices=PROFILE_OPTIONS,
+                        help="also record allocations, a cProfile (REPORT.pstats) or stack samples; may be repeated")
+    parser.add_argument('--profile-interval', type=float, default=5.0, metavar='MS',
+                        help="stack sampling interval for --profile-with sample (default: 5 ms)")
+    parser.add_argument('-x', '--exclude', action='append', default=[],
+                        help="file of extra domains to exclude, may be repeated")
+    parser.add_argument('-q', '--quiet', action='store_true', help="do not log progress to stderr")
+    parser.add_argument('--engines-config', action='append', default=[], metavar='PATH',
+                        help="JSON file of extra or replacement engine definitions, may be repeated (see dorkplugins)")
+    parser.add_argument('--list-engines', action='store_true', help="print the available engines and exit")
+    args = parser.parse_args(argv)
+    
+    if args.engines_config:
+        # Parser processes and shard workers read the same files
+        os.environ[ENV_CONFIG] = os.pathsep.join(filter(None, [os.environ.get(ENV_CONFIG)] + args.engines_config))
+        for path in args.engines_config:
+            try:
+                SEARCH_ENGINES.load_config(path)
+            except (OSError, ValueError) as e:
+                parser.error(f"cannot load engines from {path}: {e}")
+                
+    if args.list_engines:
+        for name in SEARCH_ENGINES:
+            print(name)
+        return 0
+        
+    engines = args.engines or list(SEARCH_ENGINES.keys())
+    unknown = [engine for engine in engines if engine not in SEARCH_ENGINES]
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(unknown)}")
+        
+    # Per-engine limit overrides; only the selected engines are built
+    search_engines = {}
+    for name in engines:
+        try:
+            search_engines[name] = dict(SEARCH_ENGINES[name])
+        except (ImportError, AttributeError, ValueError) as e:
+            parser.error(f"cannot load engine {name}: {e}")
+    for option, key, kind, minimum in (('rate', 'rate', float, None), ('engine_concurrency', 'concurrency', int, None),
+                                       ('min_yield', 'min_yield', float, 0)):
+        for value in getattr(args, option):
+            name, _, number = value.rpartition('=')
+            if name and name not in SEARCH_ENGINES:
+                parser.error(f"unknown engine in --{option.replace('_', '-')}: {name}")
+            # An override for an engine that is not selected has nothing to change
+            targets = [name] if name else list(search_engines)
+            try:
+                number = kind(number)
+            except ValueError:
+                parser.error(f"invalid --{option.replace('_', '-')} value: {value}")
+            if minimum is None and number <= 0:
+                parser.error(f"--{option.replace('_', '-')} must be positive: {value}")
+            if minimum is not None and number < minimum:
+                parser.error(f"--{option.replace('_', '-')} must be at least {minimum}: {value}")
+            for target in targets:
+                if target in search_engines:
+                    search_engines[target][key] = number
+        
+    # Streamed, so huge dork files are never held in memory
+    try:
+        dorks = DorkSource(args.dorks or ['-'])
+        # Checked before the output file and journal are created
+        if dorks.peek() is None:
+            parser.error("no dorks given")
+    except OSError as e:
+        parser.error(f"cannot read dorks: {e}")
+        
+    excluder = DomainExcluder()
+    for path in args.exclude:
+        excluder.load_file(path)
+        
+    if args.extractor:
+        try:
+            set_default_backend(args.extractor)
+        except ImportError as e:
+            parser.error(f"extractor {args.extractor} is not available ({e}); installed: "
+                         f"{', '.join(available_backends())}")
+            
+    options = {}
+    if args.backend == 'pipeline':
+        options = {'parse_workers': args.parse_workers, 'queue_size': args.queue_size}
+    elif args.parse_workers or args.queue_size:
+        parser.error("--parse-workers and --queue-size need --backend pipeline")
+    if args.max_per_host is not None:
+        if args.max_per_host <= 0:
+            parser.error("--max-per-host must be positive")
+        options['max_per_host'] = args.max_per_host
+    grouped = None
+    if args.group_by_host:
+        if args.journal:
+            parser.error("--group-by-host cannot resume a journal; it writes the output once, at the end")
+        if (args.format or guess_format(args.output)) != 'text':
+            parser.error("--group-by-host writes text output only")
+        # Held here so an interrupted run still writes what it found
+        grouped = options['compact_results'] = ResultStore()
+    options['metrics'] = Metrics()
+    backend = args.backend
+    if args.profile:
+        backend = profiled(ENGINE_BACKENDS[args.backend])
+        options['profiler'] = StageProfiler('allocations' in args.profile_with, 'cprofile' in args.profile_with,
+                                            args.profile_interval / 1000 if 'sample' in args.profile_with else None)
+    elif args.profile_with:
+        parser.error("--profile-with needs --profile")
+    metrics_server = None
+    if args.metrics_port is not None:
+        try:
+            metrics_server = MetricsServer(options['metrics'], args.metrics_host, args.metrics_port)
+        except OSError as e:
+            parser.error(f"cannot serve metrics on {args.metrics_host}:{args.metrics_port}: {e}")
+        if not args.quiet:
+            print(f"Metrics on http://{args.metrics_host}:{metrics_server.address[1]}/metrics", file=sys.stderr)
+        
+    # stdout is flushed on every batch so pipes see results promptly
+    stream = args.output == '-'
+    sink = None
+    if grouped is None:
+        sink = ResultSink(args.output, args.format, flush_interval=0 if stream else 1.0)
+    if sink is not None and sink.repaired and not args.quiet:
+        print(f"Repaired {args.output}: dropped the unfinished gzip member left by an interrupted run",
+              file=sys.stderr)
+    journal = Journal(args.journal) if args.journal else None
+    cache = ResponseCache(args.cache, args.cache_ttl * 3600, args.cache_size * 1024 * 1024) if args.cache else None
+    if journal is not None and not args.quiet:
+        stats = journal.stats()
+        if stats['pages'] or stats['failed_pages']:
+            print(f"Resuming {args.journal}: {stats['pages']} pages done, {stats['failed_pages']} failed to retry, "
+                  f"{stats['finished_pairs']}/{stats['pairs']} dork/engine pairs finished, "
+                  f"{stats['seen_urls']} URLs seen", file=sys.stderr)
+    
+    def on_result(result):
+        if args.quiet:
+            return
+        if 'error' in result:
+            print(f"Error in {result['engine']} for dork '{result['dork']}': {result['error']}", file=sys.stderr)
+        else:
+            print(f"{result['engine']} - Dork: '{result['dork']}' - "
+                  f"Page {result['page']} - Found: {result['total']} - Valid: {result['valid']}", file=sys.stderr)
+    
+    try:
+        engine = run(dorks, engines, args.concurrency, on_result=on_result, excluder=excluder,
+                     backend=backend, search_engines=search_engines, sink=sink, journal=journal, cache=cache, **options)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if sink is not None:
+            sink.close()
+        if grouped is not None:
+            export_grouped(grouped, args.output)
+        if metrics_server is not None:
+            metrics_server.close()
+        if journal is not None:
+            journal.close()
+        if cache is not None:
+            cache_stats = cache.stats()
+            cache.close()
+            
+    if args.profile:
+        try:
+            profile_files = engine.profiler.write_report(args.profile)
+        except OSError as e:
+            parser.error(f"cannot write profile report: {e}")
+    if not args.quiet:
+        progress = dorks.progress()
+        print(f"Dorks: {progress['dorks']} from {progress['lines']} lines "
+              f"({progress['duplicates']} duplicates, {progress['bytes'] / 1048576:.1f} MB read)", file=sys.stderr)
+        print(f"Total valid URLs found: {engine.valid_count}", file=sys.stderr)
+        for line in engine.yield_report():
+            print(line, file=sys.stderr)
+        for line in engine.metrics_report():
+            print(line, file=sys.stderr)
+        if args.profile:
+            for line in engine.profiler.summary_lines():
+                print(line, file=sys.stderr)
+            print(f"Profile written to {', '.join(profile_files)}", file=sys.stderr)
+        if cache is not None:
+            print(f"Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                  f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']} entries, "
+                  f"{cache_stats['bytes'] / 1048576:.1f} MB, {cache_stats['evictions']} evicted", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""Link extraction backends for search result pages.
+
+Each engine declares the CSS selector of its result links once, as a
+SelectorExtractor, and the extractor pulls the href of every matching
+element using the fastest backend installed:
+
+    selectolax  -> lexbor/modest C parser, if selectolax is installed
+    lxml        -> lxml.html + cssselect, if both are installed
+    stream      -> stdlib HTMLParser walk that never builds a tree
+    soup        -> BeautifulSoup with html.parser (reference, never auto-picked)
+
+The choice can be forced with the DORK_EXTRACTOR environment variable (which
+parser processes inherit) or set_default_backend(). Selectors for the stream
+backend are limited to tag/.class/#id compounds joined by descendant or '>'
+combinators, which covers every engine shipped here.
+
+JSON APIs use a JSONExtractor instead, which decodes with orjson when it
+is installed and the stdlib json module otherwise.
+
+    python dorkextract.py --check fixtures/serp
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from html.parser import HTMLParser
+
+ENV_BACKEND = 'DORK_EXTRACTOR'
+
+# Elements that never have content, so they are not pushed on the open stack
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+])
+
+_COMPOUND = re.compile(r'([a-zA-Z][a-zA-Z0-9-]*|\*)?((?:[.#][a-zA-Z0-9_-]+)*)$')
+
+def parse_selector(selector):
+    """Compile a simple selector into [(combinator, tag, classes, id), ...]"""
+    steps = []
+    combinator = ' '
+    for token in selector.replace('>', ' > ').split():
+        if token == '>':
+            if not steps or combinator == '>':
+                raise ValueError(f"Unsupported selector: {selector!r}")
+            combinator = '>'
+            continue
+        match = _COMPOUND.match(token)
+        if not match or not token:
+            raise ValueError(f"Unsupported selector: {selector!r}")
+        tag = match.group(1)
+        classes = []
+        element_id = None
+        for part in re.findall(r'[.#][a-zA-Z0-9_-]+', match.group(2)):
+            if part[0] == '.':
+                classes.append(part[1:])
+            else:
+                element_id = part[1:]
+        steps.append((combinator, None if tag in (None, '*') else tag.lower(), frozenset(classes), element_id))
+        combinator = ' '
+    if not steps or combinator == '>':
+        raise ValueError(f"Unsupported selector: {selector!r}")
+    return steps
+
+def _matches(step, node):
+    _, tag, classes, element_id = step
+    node_tag, node_classes, node_id = node
+    return ((tag is None or tag == node_tag) and classes <= node_classes
+            and (element_id is None or element_id == node_id))
+
+def _match_ancestors(steps, index, stack, top):
+    """Match steps[:index + 1] against stack[:top], honouring each step's combinator"""
+    if index < 0:
+        return True
+    combinator = steps[index + 1][0]
+    if combinator == '>':
+        return top > 0 and _matches(steps[index], stack[top - 1]) and \
+            _match_ancestors(steps, index - 1, stack, top - 1)
+    for position in range(top - 1, -1, -1):
+        if _matches(steps[index], stack[position]) and _match_ancestors(steps, index - 1, stack, position):
+            return True
+    return False
+
+class _StreamMatcher(HTMLParser):
+    """Collects attribute values of elements matching a compiled selector.
+
+    Only a stack of (tag, classes, id) for the open elements is kept, with
+    the same nesting rules as BeautifulSoup's html.parser builder: end tags
+    close back to the nearest matching open element and stray ones are
+    ignored.
+    """
+
+    def __init__(self, steps, attribute):
+        super().__init__()
+        self.steps = steps
+        self.attribute = attribute
+        self.stack = []
+        self.values = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        node = (tag, frozenset((attributes.get('class') or '').split()), attributes.get('id'))
+        if _matches(self.steps[-1], node) and self.attribute in attributes and \
+                _match_ancestors(self.steps, len(self.steps) - 2, self.stack, len(self.stack)):
+            self.values.append(attributes[self.attribute] or '')
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        for position in range(len(self.stack) - 1, -1, -1):
+            if self.stack[position][0] == tag:
+                del self.stack[position:]
+                return
+
+def _extract_stream(html_content, selector, compiled, attribute):
+    matcher = _StreamMatcher(compiled, attribute)
+    matcher.feed(html_content)
+    matcher.close()
+    return matcher.values
+
+def _extract_selectolax(html_content, selector, compiled, attribute):
+    values = []
+    for node in _selectolax_parser(html_content).css(selector):
+        attributes = node.attributes
+        if attribute in attributes:
+            values.append(attributes[attribute] or '')
+    return values
+
+_lxml_selectors = {}
+
+def _extract_lxml(html_content, selector, compiled, attribute):
+    if not html_content.strip():
+        return []
+    css = _lxml_selectors.get(selector)
+    if css is None:
+        css = _lxml_selectors[selector] = _lxml_cssselect.CSSSelector(selector)
+    values = []
+    for element in css(_lxml_html.document_fromstring(html_content)):
+        value = element.get(attribute)
+        if value is not None:
+            values.append(value)
+    return values
+
+def _extract_soup(html_content, selector, compiled, attribute):
+    soup = _BeautifulSoup(html_content, 'html.parser')
+    return [result[attribute] for result in soup.select(selector) if attribute in result.attrs]
+
+def _load_selectolax():
+    global _selectolax_parser
+    try:
+        from selectolax.lexbor import LexborHTMLParser as _selectolax_parser
+    except ImportError:
+        from selectolax.parser import HTMLParser as _selectolax_parser
+
+def _load_lxml():
+    global _lxml_html, _lxml_cssselect
+    import lxml.html as _lxml_html
+    import lxml.cssselect as _lxml_cssselect
+
+def _load_soup():
+    global _BeautifulSoup
+    from bs4 import BeautifulSoup as _BeautifulSoup
+
+# name -> (loader, extract function); order is the auto-selection preference
+BACKENDS = {
+    'selectolax': (_load_selectolax, _extract_selectolax),
+    'lxml': (_load_lxml, _extract_lxml),
+    'stream': (None, _extract_stream),
+    'soup': (_load_soup, _extract_soup)
+}
+AUTO_BACKENDS = ('selectolax', 'lxml', 'stream')
+
+_loaded = {}
+_default_backend = None
+
+def load_backend(name):
+    """Return the extract function for backend name, or raise ImportError"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown extractor backend: {name}")
+    if name not in _loaded:
+        loader, extract = BACKENDS[name]
+        if loader is not None:
+            loader()
+        _loaded[name] = extract
+    return _loaded[name]
+
+def available_backends():
+    names = []
+    for name in BACKENDS:
+        try:
+            load_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+def default_backend():
+    """Name of the backend used when an extractor does not pin one"""
+    global _default_backend
+    if _default_backend is None:
+        forced = os.environ.get(ENV_BACKEND)
+        if forced:
+            load_backend(forced)
+            _default_backend = forced
+        else:
+            for name in AUTO_BACKENDS:
+                try:
+                    load_backend(name)
+                except ImportError:
+                    continue
+                _default_backend = name
+                break
+    return _default_backend
+
+def set_default_backend(name):
+    """Use backend name everywhere, including parser processes started later"""
+    global _default_backend
+    load_backend(name)
+    _default_backend = name
+    os.environ[ENV_BACKEND] = name
+
+class SelectorExtractor:
+    """Callable returning the href of every element matching selector.
+
+    Instances are plain picklable objects, so they can be sent to parser
+    processes. skip_relative drops site-relative links ('/...'), which some
+    engines use for their own redirects.
+    """
+
+    def __init__(self, selector, attribute='href', skip_relative=False, backend=None):
+        self.selector = selector
+        self.attribute = attribute
+        self.skip_relative = skip_relative
+        self.backend = backend
+        self.compiled = parse_selector(selector)
+
+    def __call__(self, html_content, backend=None):
+        extract = load_backend(backend or self.backend or default_backend())
+        values = extract(html_content, self.selector, self.compiled, self.attribute)
+        if self.skip_relative:
+            values = [value for value in values if not value.startswith('/')]
+        return values
+
+    def __repr__(self):
+        return f"SelectorExtractor({self.selector!r})"
+
+_json_loads = None
+
+def json_loads(data):
+    """Decode JSON text or bytes with orjson if installed, else the stdlib"""
+    global _json_loads
+    if _json_loads is None:
+        try:
+            import orjson
+            _json_loads = orjson.loads
+        except ImportError:
+            _json_loads = json.loads
+    return _json_loads(data)
+
+class JSONExtractor:
+    """Callable returning the field of every item in a JSON API response.
+
+    path names the list of results ('items', or dotted for nested lists,
+    e.g. 'data.results'); a response without it has no results. Invalid
+    JSON raises ValueError, so the engine reports it instead of counting
+    an empty page.
+    """
+
+    def __init__(self, path='items', field='link'):
+        self.path = path
+        self.field = field
+
+    def __call__(self, json_content, backend=None):
+        data = json_loads(json_content)
+        for key in self.path.split('.'):
+            if not isinstance(data, dict):
+                return []
+            data = data.get(key)
+        if not isinstance(data, list):
+            return []
+        return [item[self.field] for item in data
+                if isinstance(item, dict) and isinstance(item.get(self.field), str)]
+
+    def __repr__(self):
+        return f"JSONExtractor({self.path!r}, {self.field!r})"
+
+def check_fixtures(directory, extractors, backends=None, repeat=20):
+    """Compare every backend against directory/expected.json.
+
+    expected.json maps an engine name to {"file": ..., "urls": [...]}.
+    Returns a list of (engine, backend, ok, seconds per page) rows.
+    """
+    with open(os.path.join(directory, 'expected.json'), 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    rows = []
+    for engine_name, entry in expected.items():
+        extractor = extractors.get(engine_name)
+        if getattr(extractor, 'selector', None) is None:
+            # Not an HTML engine (e.g. a JSON API)
+            continue
+        with open(os.path.join(directory, entry['file']), 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        for name in backends or available_backends():
+            urls = extractor(html_content, backend=name)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                extractor(html_content, backend=name)
+            rows.append((engine_name, name, urls == entry['urls'], (time.perf_counter() - started) / repeat))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check extractor backends against saved result pages.")
+    parser.add_argument('--check', metavar='DIR', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                        'fixtures', 'serp'),
+                        help="fixture directory containing expected.json (default: fixtures/serp)")
+    parser.add_argument('-b', '--backend', action='append', choices=list(BACKENDS),
+                        help="backend to check, may be repeated (default: all installed)")
+    args = parser.parse_args(argv)
+
+    from dorkengine import SEARCH_ENGINES
+    extractors = {name: config['parser'] for name, config in SEARCH_ENGINES.items()}
+    failed = 0
+    for engine_name, name, ok, seconds in check_fixtures(args.check, extractors, args.backend):
+        failed += not ok
+        print(f"{engine_name:<12} {name:<11} {'ok' if ok else 'MISMATCH':<9} {seconds * 1000:8.3f} ms/page")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""SQLite job journal for checkpointing and resuming long dork runs.
+
+The journal records every finished (dork, engine, page) task, how far each
+(dork, engine) pair has paginated and the normalized keys of every valid
+URL found. A run started with the same journal file skips pairs that are
+finished, continues the others from their next page and starts with the
+dedup index already filled, so no page is requested twice. Pages that
+failed (network errors, non-200 responses, throttling that ran out of
+retries) are recorded with their status but do not move their pair on;
+a resumed run asks for them again, on their own if later pages of the
+pair already went through.
+
+Writes are batched into one transaction per commit_interval seconds (WAL
+mode), so a crash costs at most that much repeated work. When a run
+streams to a dorksink.ResultSink, DorkEngine hands its journal writes to
+the sink, which applies them only after the URLs reported before them are
+flushed and fsync'ed, and commits right after. A page and the URL keys
+it added are written in one transaction, so the journal never gets ahead
+of the result file: a kill can repeat a page whose URLs were just written
+(duplicate lines), but cannot lose URLs.
+"""
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS pairs (
+    dork TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    next_page INTEGER NOT NULL,
+    finished INTEGER NOT NULL,
+    PRIMARY KEY (dork, engine)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pages (
+    dork TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    status INTEGER,
+    found INTEGER,
+    done_at REAL NOT NULL,
+    PRIMARY KEY (dork, engine, page)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seen (
+    key TEXT PRIMARY KEY
+) WITHOUT ROWID;
+"""
+
+class Journal:
+    """Thread-safe handle on one journal file"""
+
+    def __init__(self, path, commit_interval=1.0):
+        self.path = path
+        self.commit_interval = commit_interval
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.in_transaction = False
+        self.last_commit = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self, *statements):
+        # Caller must hold the lock; statements are (sql, rows) pairs, committed together
+        if not self.in_transaction:
+            self.db.execute("BEGIN")
+            self.in_transaction = True
+        for sql, rows in statements:
+            self.db.executemany(sql, rows)
+        if time.monotonic() - self.last_commit >= self.commit_interval:
+            self._commit()
+
+    def _commit(self):
+        if self.in_transaction:
+            self.db.execute("COMMIT")
+            self.in_transaction = False
+        self.last_commit = time.monotonic()
+
+    def commit(self):
+        with self.lock:
+            self._commit()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self._commit()
+                self.db.close()
+                self.db = None
+
+    def begin(self, engines):
+        """Note the engines of this run; returns True if the journal already had work"""
+        with self.lock:
+            resumed = self.db.execute("SELECT 1 FROM pairs LIMIT 1").fetchone() is not None
+            self._write(("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                         [('engines', ','.join(engines)), ('started_at', str(time.time()))]))
+            self._commit()
+            return resumed
+
+    def next_page(self, dork, engine):
+        """Page to start (dork, engine) from, or None if it is finished"""
+        with self.lock:
+            row = self.db.execute("SELECT next_page, finished FROM pairs WHERE dork = ? AND engine = ?",
+                                  (dork, engine)).fetchone()
+        if row is None:
+            return 0
+        return None if row[1] else row[0]
+
+    def page_done(self, dork, engine, page, status, found, finished, keys=()):
+        """Record a page and the URL keys it added; finished marks the end of the pair's pagination.
+
+        A failed page (found is None) only has its status recorded, so the
+        pair is resumed from it.
+        """
+        statements = [("INSERT OR REPLACE INTO pages (dork, engine, page, status, found, done_at) "
+                       "VALUES (?, ?, ?, ?, ?, ?)", [(dork, engine, page, status, found, time.time())])]
+        if found is not None:
+            statements.append(("INSERT INTO pairs (dork, engine, next_page, finished) VALUES (?, ?, ?, ?) "
+                               "ON CONFLICT (dork, engine) DO UPDATE SET "
+                               "next_page = max(next_page, excluded.next_page), "
+                               # A retried earlier page does not end the pair
+                               "finished = CASE WHEN excluded.next_page > next_page "
+                               "THEN max(finished, excluded.finished) ELSE finished END",
+                               [(dork, engine, page + 1, int(finished))]))
+            statements.append(("INSERT OR IGNORE INTO seen (key) VALUES (?)", [(key,) for key in keys]))
+        with self.lock:
+            self._write(*statements)
+
+    def failed_pages(self, dork, engine):
+        """Pages of (dork, engine) that failed while later pages were fetched"""
+        with self.lock:
+            rows = self.db.execute("SELECT pages.page FROM pages JOIN pairs USING (dork, engine) "
+                                   "WHERE dork = ? AND engine = ? AND found IS NULL AND page < next_page "
+                                   "ORDER BY page", (dork, engine)).fetchall()
+        return [page for (page,) in rows]
+
+    def add_seen(self, keys):
+        """Record normalized URL keys accepted by the dedup index"""
+        if keys:
+            with self.lock:
+                self._write(("INSERT OR IGNORE INTO seen (key) VALUES (?)", [(key,) for key in keys]))
+
+    def seen_keys(self, batch=10000):
+        """Yield every recorded URL key"""
+        last = ''
+        while True:
+            with self.lock:
+                self._commit()
+                rows = self.db.execute("SELECT key FROM seen WHERE key > ? ORDER BY key LIMIT ?",
+                                       (last, batch)).fetchall()
+            if not rows:
+                return
+            for (key,) in rows:
+                yield key
+            last = rows[-1][0]
+
+    def stats(self):
+        with self.lock:
+            pairs, finished = self.db.execute("SELECT count(*), coalesce(sum(finished), 0) FROM pairs").fetchone()
+            pages, failed = self.db.execute("SELECT count(found), count(*) - count(found) FROM pages").fetchone()
+            seen = self.db.execute("SELECT count(*) FROM seen").fetchone()[0]
+        return {'pairs': pairs, 'finished_pairs': finished, 'pages': pages, 'failed_pages': failed,
+                'seen_urls': seen}
@@ -0,0 +1,236 @@
+"""Per-worker run metrics, merged on read, with an optional HTTP exporter.
+
+Each worker thread (or the event loop thread of the async backend) writes
+to its own WorkerStats, so recording a page never takes a lock shared with
+the other workers; snapshot() adds the shards up when someone asks. What
+is recorded, per engine:
+
+    requests, status codes, response bytes, errors
+    links found, new URLs, dedup checks and hits (duplicates)
+    filter outcomes by reason, excluded URLs by listed domain
+    fetch / parse / filter latency histograms
+    queue depths, sampled from gauges when a snapshot is taken
+
+MetricsServer publishes a snapshot over HTTP, as Prometheus text on
+/metrics and JSON on /metrics.json:
+
+    python dorkengine.py -d dorks.txt -e Bing --metrics-port 9464
+    curl -s localhost:9464/metrics
+"""
+import bisect
+import json
+import threading
+from collections import Counter
+
+# Label names of the metrics counted per (metric, engine, label) key, besides status
+LABELS = {'filtered': 'reason', 'excluded_domain': 'domain'}
+
+# Latency histogram bucket upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGES = ('fetch', 'parse', 'filter')
+
+class WorkerStats:
+    """Counters and histograms written by a single thread"""
+
+    def __init__(self):
+        # (metric, engine) or (metric, engine, label) -> value
+        self.counters = Counter()
+        # metric -> value over all engines, so status lines need not merge the counters
+        self.totals = Counter()
+        # (stage, engine) -> [bucket counts..., +Inf count, sum]
+        self.histograms = {}
+
+    def count(self, key, value=1):
+        self.counters[key] += value
+        self.totals[key[0]] += value
+
+    def observe(self, stage, engine_name, seconds):
+        histogram = self.histograms.get((stage, engine_name))
+        if histogram is None:
+            histogram = self.histograms[(stage, engine_name)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        histogram[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+class Metrics:
+    """Registry of WorkerStats, one per thread that records anything.
+
+    Threads register themselves on first use (the only locked step);
+    reset() starts a new generation so stats from an earlier run are
+    dropped without touching the threads that still hold them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.workers = []
+        self.gauges = {}
+        self.generation = 0
+        self._local = threading.local()
+
+    def local(self):
+        """This thread's WorkerStats"""
+        local = self._local
+        if getattr(local, 'generation', None) != self.generation:
+            stats = WorkerStats()
+            with self.lock:
+                self.workers.append(stats)
+                local.generation = self.generation
+            local.stats = stats
+        return local.stats
+
+    def reset(self):
+        with self.lock:
+            self.workers = []
+            self.generation += 1
+
+    def gauge(self, name, read):
+        """Register read() -> number or {engine: number}, sampled by snapshot()"""
+        self.gauges[name] = read
+
+    def counters(self):
+        """Merged counters of every worker"""
+        with self.lock:
+            workers = list(self.workers)
+        total = Counter()
+        for stats in workers:
+            # dict.copy is atomic, so a worker writing meanwhile cannot break the copy
+            total.update(dict.copy(stats.counters))
+        return total
+
+    def totals(self):
+        """{metric: value} summed over engines and workers; cheap enough for every UI tick"""
+        with self.lock:
+            workers = list(self.workers)
+        total = Counter()
+        for stats in workers:
+            total.update(dict.copy(stats.totals))
+        return total
+
+    def snapshot(self):
+        """Merged view: {'engines': {engine: {...}}, 'gauges': {...}}"""
+        with self.lock:
+            workers = list(self.workers)
+        counters = Counter()
+        histograms = {}
+        for stats in workers:
+            counters.update(dict.copy(stats.counters))
+            for key, values in dict.copy(stats.histograms).items():
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = list(values)
+                else:
+                    for index, value in enumerate(values):
+                        merged[index] += value
+
+        engines = {}
+        for key, value in counters.items():
+            metric, engine_name = key[0], key[1]
+            entry = engines.setdefault(engine_name, {'status': {}})
+            if len(key) > 2:
+                entry.setdefault(metric, {})[key[2]] = value
+            else:
+                entry[metric] = value
+        for (stage, engine_name), values in histograms.items():
+            entry = engines.setdefault(engine_name, {'status': {}})
+            entry.setdefault('latency', {})[stage] = {
+                'buckets': values[:-1], 'count': sum(values[:-1]), 'sum': values[-1]
+            }
+        for entry in engines.values():
+            checks = entry.get('dedup_checks', 0)
+            entry['dedup_hit_rate'] = entry.get('dedup_hits', 0) / checks if checks else 0.0
+
+        gauges = {}
+        for name, read in list(self.gauges.items()):
+            try:
+                gauges[name] = read()
+            except Exception:
+                # A gauge on something already torn down
+                continue
+        return {'engines': engines, 'gauges': gauges, 'buckets': list(LATENCY_BUCKETS)}
+
+def _labels(**labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+def render_text(snapshot, prefix='dork'):
+    """Prometheus text exposition format of a snapshot, one group per metric"""
+    families = {}
+    def add(name, kind, line):
+        families.setdefault(name, (kind, []))[1].append(line)
+
+    for engine_name, entry in sorted(snapshot['engines'].items()):
+        for metric, value in sorted(entry.items()):
+            if metric in ('status', 'latency'):
+                continue
+            if isinstance(value, dict):
+                name = f"{prefix}_{metric}_total"
+                for label, number in sorted(value.items(), key=lambda item: str(item[0])):
+                    add(name, 'counter', f"{name}{_labels(engine=engine_name, **{LABELS[metric]: label})} {number}")
+                continue
+            if metric == 'dedup_hit_rate':
+                name, kind = f"{prefix}_{metric}", 'gauge'
+            else:
+                name, kind = f"{prefix}_{metric}_total", 'counter'
+            add(name, kind, f"{name}{_labels(engine=engine_name)} {value}")
+        name = f"{prefix}_responses_total"
+        for status, value in sorted(entry['status'].items(), key=lambda item: str(item[0])):
+            add(name, 'counter', f"{name}{_labels(engine=engine_name, status=status)} {value}")
+        for stage, histogram in sorted(entry.get('latency', {}).items()):
+            name = f"{prefix}_{stage}_seconds"
+            cumulative = 0
+            for bound, count in zip(list(snapshot['buckets']) + ['+Inf'], histogram['buckets']):
+                cumulative += count
+                add(name, 'histogram', f"{name}_bucket{_labels(engine=engine_name, le=bound)} {cumulative}")
+            add(name, 'histogram', f"{name}_sum{_labels(engine=engine_name)} {histogram['sum']:.6f}")
+            add(name, 'histogram', f"{name}_count{_labels(engine=engine_name)} {histogram['count']}")
+    for gauge, value in sorted(snapshot['gauges'].items()):
+        name = f"{prefix}_{gauge}"
+        if isinstance(value, dict):
+            for engine_name, number in sorted(value.items()):
+                add(name, 'gauge', f"{name}{_labels(engine=engine_name)} {number}")
+        else:
+            add(name, 'gauge', f"{name} {value}")
+
+    lines = []
+    for name, (kind, samples) in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+class MetricsServer:
+    """Serves a Metrics registry on /metrics (text) and /metrics.json from a background thread"""
+
+    def __init__(self, metrics, host='127.0.0.1', port=9464):
+        # http.server pulls in email and socketserver; only runs that export metrics need them
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        self.metrics = metrics
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = render_text(registry.metrics.snapshot()).encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body = json.dumps(registry.metrics.snapshot(), default=str).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = self.server.server_address
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,15 +1,22 @@
 import tkinter as tk
 from tkinter import scrolledtext, ttk, messagebox, filedialog
-import threading
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-import queue
 import os
-import re
-import time
-import random
-from urllib.parse import quote_plus
+import threading
+from dorkengine import DorkEngine, ENGINE_BACKENDS
+from dorkcontrol import STOPPED
+from dorksink import ResultSink
+from dorksource import DorkSource
+from dorkprofile import StageProfiler, profiled
+
+# Results taken off the engine queue per UI tick; the rest waits for the next one
+UI_BATCH = 5000
+# Above this many pages in one tick, log one summary line per engine instead
+UI_DETAIL_LIMIT = 20
+# Lines kept in the progress log
+LOG_LINES = 1000
+# Lines of a loaded dork file shown in the text area; the run streams the file itself
+PREVIEW_LINES = 200
 
 class DorkParser:
     def __init__(self, root):
@@ -18,73 +25,21 @@ class DorkParser:
         self.root.geometry("800x700")
         self.root.configure(bg="#f0f0f0")
         
-        # Variables
-        self.is_running = False
-        self.is_paused = False
-        self.valid_urls = []
-        self.current_dork_index = 0
-        self.results_queue = queue.Queue()
-        self.active_threads = []
-        self.lock = threading.Lock()
+        # Scraping engine (no UI code lives there)
+        self.engine = DorkEngine()
+        self.search_engines = self.engine.search_engines
         
-        # Search engines configuration
-        self.search_engines = {
-            'Bing': {
-                'url': lambda dork, page=0: f"https://www.bing.com/search?q={dork}&first={page*10+1}&count=100",
-                'max_pages': 10,
-                'parser': self.parse_bing
-            },
-            'DuckDuckGo': {
-                'url': lambda dork, page=0: f"https://html.duckduckgo.com/html/?q={dork}&s={page*30}",
-                'max_pages': 5,
-                'parser': self.parse_duckduckgo
-            },
-            'Yahoo': {
-                'url': lambda dork, page=0: f"https://search.yahoo.com/search?p={dork}&b={page*10+1}",
-                'max_pages': 10,
-                'parser': self.parse_yahoo
-            },
-            'AOL': {
-                'url': lambda dork, page=0: f"https://search.aol.com/aol/search?q={dork}&b={page*10+1}",
-                'max_pages': 10,
-                'parser': self.parse_aol
-            },
-            'Google APIs': {
-                'url': lambda dork, page=0: f"https://www.googleapis.com/customsearch/v1?q={dork}&start={page*10+1}&key=YOUR_API_KEY&cx=YOUR_CX_KEY",
-                'max_pages': 10,
-                'parser': self.parse_google_api
-            },
-            'Bing News': {
-                'url': lambda dork, page=0: f"https://www.bing.com/news/search?q={dork}&first={page*10+1}",
-                'max_pages': 5,
-                'parser': self.parse_bing_news
-            },
-            'Naver': {
-                'url': lambda dork, page=0: f"https://search.naver.com/search.naver?query={dork}&start={page*10+1}",
-                'max_pages': 5,
-                'parser': self.parse_naver
-            },
-            'Yandex': {
-                'url': lambda dork, page=0: f"https://yandex.com/search/?text={dork}&p={page}",
-                'max_pages': 10,
-                'parser': self.parse_yandex
-            }
-        }
+        # Dork file streamed by the next run, unless the text area is edited
+        self.dork_file = None
+        # Stage timing report of the current run, if profiling
+        self.profile_file = None
+        # Set by an engine thread when the run stops; the UI tick finishes the run
+        self.run_stopped = threading.Event()
         
-        # Headers with different user agents
-        self.user_agents = [
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
-            'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Edge/91.0.864.59'
-        ]
-        
-        # Stats for each engine
-        self.engine_stats = {engine: {'total': 0, 'valid': 0} for engine in self.search_engines.keys()}
-        
-        # Create UI elements
+        # Create UI elements; the engine list needs the registry to scan
+        # installed plugins, so it is filled in once the window is up
         self.create_ui()
+        self.root.after_idle(self.create_engine_checkboxes)
         
         # Update stats periodically
         self.root.after(100, self.update_from_queue)
@@ -106,27 +61,17 @@ class DorkParser:
         btn_frame.pack(fill=tk.X, pady=5)
         
         ttk.Button(btn_frame, text="Load Dorks File", command=self.load_dorks_file).pack(side=tk.LEFT, padx=5)
-        ttk.Button(btn_frame, text="Clear", command=lambda: self.dork_text.delete(1.0, tk.END)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Clear", command=self.clear_dorks).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Load Exclusions", command=self.load_exclusions_file).pack(side=tk.LEFT, padx=5)
         
         # Middle section: Search engines selection
         engine_frame = ttk.LabelFrame(main_frame, text="Search Engines", padding="10")
         engine_frame.pack(fill=tk.X, pady=5)
         
-        # Create checkboxes for each engine
+        # Checkboxes for each engine, see create_engine_checkboxes
         self.engine_vars = {}
-        engine_inner_frame = ttk.Frame(engine_frame)
-        engine_inner_frame.pack(fill=tk.X)
-        
-        col, row = 0, 0
-        for engine in self.search_engines.keys():
-            var = tk.BooleanVar(value=True)
-            self.engine_vars[engine] = var
-            cb = ttk.Checkbutton(engine_inner_frame, text=engine, variable=var)
-            cb.grid(row=row, column=col, sticky="w", padx=10, pady=2)
-            col += 1
-            if col > 3:  # 4 checkboxes per row
-                col = 0
-                row += 1
+        self.engine_inner_frame = ttk.Frame(engine_frame)
+        self.engine_inner_frame.pack(fill=tk.X)
         
         # Thread count slider
         thread_frame = ttk.Frame(main_frame)
@@ -141,6 +86,16 @@ class DorkParser:
         thread_label = ttk.Label(thread_frame, textvariable=self.thread_var)
         thread_label.pack(side=tk.LEFT, padx=5)
         
+        # Worker model: threads, coroutines on one event loop, or staged pipeline
+        ttk.Label(thread_frame, text="Mode:").pack(side=tk.LEFT, padx=5)
+        self.backend_var = tk.StringVar(value='threads')
+        ttk.Combobox(thread_frame, textvariable=self.backend_var, values=list(ENGINE_BACKENDS),
+                     state='readonly', width=10).pack(side=tk.LEFT, padx=5)
+        
+        # Per-stage timing report (with stack samples) written next to the results
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(thread_frame, text="Profile", variable=self.profile_var).pack(side=tk.LEFT, padx=5)
+        
         # Control buttons
         control_frame = ttk.Frame(main_frame)
         control_frame.pack(fill=tk.X, pady=10)
@@ -177,34 +132,61 @@ class DorkParser:
         self.url_count_var = tk.StringVar(value="URLs found: 0 | Valid URLs: 0")
         ttk.Label(status_frame, textvariable=self.url_count_var).pack(side=tk.RIGHT)
 
+    def create_engine_checkboxes(self):
+        col, row = 0, 0
+        for engine in self.search_engines.keys():
+            var = tk.BooleanVar(value=True)
+            self.engine_vars[engine] = var
+            cb = ttk.Checkbutton(self.engine_inner_frame, text=engine, variable=var)
+            cb.grid(row=row, column=col, sticky="w", padx=10, pady=2)
+            col += 1
+            if col > 3:  # 4 checkboxes per row
+                col = 0
+                row += 1
+
     def load_dorks_file(self):
-        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt *.txt.gz"), ("All files", "*.*")])
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                    self.dork_text.delete(1.0, tk.END)
-                    self.dork_text.insert(tk.END, content)
+                # Only preview the file; the run streams it from disk
+                preview = DorkSource(file_path, dedupe=False).next_chunk(PREVIEW_LINES)
+                self.dork_text.delete(1.0, tk.END)
+                self.dork_text.insert(tk.END, '\n'.join(preview))
+                self.dork_text.edit_modified(False)
+                self.dork_file = file_path
+                size = os.path.getsize(file_path) / 1048576
+                self.log_message(f"Dorks will be read from {file_path} ({size:.1f} MB); "
+                                 f"showing the first {len(preview)}, edit the list to use it instead")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load file: {str(e)}")
 
-    def get_random_user_agent(self):
-        return {'User-Agent': random.choice(self.user_agents),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Referer': 'https://www.google.com/',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'}
+    def clear_dorks(self):
+        self.dork_text.delete(1.0, tk.END)
+        self.dork_file = None
+
+    def load_exclusions_file(self):
+        file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if file_path:
+            try:
+                added = self.engine.excluder.load_file(file_path)
+                self.log_message(f"Loaded {added} excluded domains ({len(self.engine.excluder.domains)} total)")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to load file: {str(e)}")
 
     def start_search(self):
-        # Get dorks from text area
-        dork_text = self.dork_text.get(1.0, tk.END).strip()
-        if not dork_text:
-            messagebox.showwarning("Warning", "Please add at least one dork.")
-            return
-            
-        dorks = [d.strip() for d in dork_text.split('\n') if d.strip()]
+        # Stream the loaded file, or take the dorks typed in the text area
+        if self.dork_file is not None and not self.dork_text.edit_modified():
+            try:
+                dorks = DorkSource(self.dork_file)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to open dork file: {str(e)}")
+                return
+        else:
+            dork_text = self.dork_text.get(1.0, tk.END).strip()
+            if not dork_text:
+                messagebox.showwarning("Warning", "Please add at least one dork.")
+                return
+            dorks = DorkSource.from_iterable(dork_text.split('\n'))
         
         # Check if at least one engine is selected
         selected_engines = [engine for engine, var in self.engine_vars.items() if var.get()]
@@ -212,13 +194,15 @@ class DorkParser:
             messagebox.showwarning("Warning", "Please select at least one search engine.")
             return
             
-        # Reset variables
-        self.is_running = True
-        self.is_paused = False
-        self.valid_urls = []
-        self.current_dork_index = 0
-        self.engine_stats = {engine: {'total': 0, 'valid': 0} for engine in self.search_engines.keys()}
-        
+        # Stream results to disk as they are found
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        results_file = f"results_{timestamp}.txt"
+        try:
+            sink = ResultSink(results_file)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open results file: {str(e)}")
+            return
+            
         # Update UI state
         self.start_button.config(state=tk.DISABLED)
         self.pause_button.config(state=tk.NORMAL, text="Pause")
@@ -226,121 +210,70 @@ class DorkParser:
         self.progress_text.delete(1.0, tk.END)
         self.status_var.set("Running...")
         
-        # Create worker threads
-        num_threads = self.thread_var.get()
-        self.active_threads = []
-        
-        # Launch worker threads
-        for _ in range(num_threads):
-            thread = threading.Thread(target=self.worker, args=(dorks, selected_engines), daemon=True)
-            thread.start()
-            self.active_threads.append(thread)
-            
-        # Monitoring thread
-        monitor_thread = threading.Thread(target=self.monitor_progress, daemon=True)
-        monitor_thread.start()
+        # Launch workers on a fresh engine, keeping the loaded exclusions
+        engine_class = ENGINE_BACKENDS[self.backend_var.get()]
+        options = {}
+        self.profile_file = None
+        if self.profile_var.get():
+            engine_class = profiled(engine_class)
+            options['profiler'] = StageProfiler(sample_interval=0.005)
+            self.profile_file = f"profile_{timestamp}.txt"
+        self.engine = engine_class(excluder=self.engine.excluder, sink=sink, **options)
+        self.run_stopped.clear()
+        self.engine.control.listeners.append(self.on_engine_state)
+        self.engine.start(dorks, selected_engines, self.thread_var.get())
 
-    def worker(self, dorks, selected_engines):
-        while self.is_running:
-            # Get next dork
-            with self.lock:
-                if self.current_dork_index >= len(dorks):
-                    return
-                dork_index = self.current_dork_index
-                self.current_dork_index += 1
-                
-            dork = dorks[dork_index]
-            encoded_dork = quote_plus(dork)
-            
-            # Check if paused
-            while self.is_paused and self.is_running:
-                time.sleep(0.5)
-                
-            if not self.is_running:
-                return
-                
-            # Process each selected engine
-            for engine_name in selected_engines:
-                engine_config = self.search_engines[engine_name]
-                
-                # Process multiple pages for deeper search
-                for page in range(engine_config['max_pages']):
-                    if not self.is_running:
-                        return
-                        
-                    # Check if paused
-                    while self.is_paused and self.is_running:
-                        time.sleep(0.5)
-                        
-                    try:
-                        # Get URL for this page
-                        url = engine_config['url'](encoded_dork, page)
-                        
-                        # Add a delay to avoid rate limiting
-                        time.sleep(random.uniform(1.0, 3.0))
-                        
-                        # Make request
-                        headers = self.get_random_user_agent()
-                        response = requests.get(url, headers=headers, timeout=15)
-                        
-                        if response.status_code == 200:
-                            # Parse results using engine-specific parser
-                            found_urls = engine_config['parser'](response.text)
-                            
-                            # Filter and validate URLs
-                            valid_found = self.filter_urls(found_urls)
-                            
-                            # Update stats
-                            with self.lock:
-                                self.engine_stats[engine_name]['total'] += len(found_urls)
-                                self.engine_stats[engine_name]['valid'] += len(valid_found)
-                                self.valid_urls.extend(valid_found)
-                            
-                            # Update queue
-                            self.results_queue.put({
-                                'engine': engine_name,
-                                'dork': dork,
-                                'total': len(found_urls),
-                                'valid': len(valid_found),
-                                'page': page + 1
-                            })
-                            
-                            # If no results found on this page, stop paginating
-                            if len(found_urls) == 0:
-                                break
-                                
-                    except Exception as e:
-                        # Log error but continue
-                        self.results_queue.put({
-                            'engine': engine_name,
-                            'dork': dork,
-                            'error': str(e)
-                        })
+    def on_engine_state(self, state):
+        """Called from a worker thread on every run state change; must not touch Tk"""
+        if state == STOPPED:
+            # Finished or fully drained after Stop
+            self.run_stopped.set()
 
     def toggle_pause(self):
-        self.is_paused = not self.is_paused
-        if self.is_paused:
+        if not self.engine.is_paused:
+            self.engine.pause()
             self.pause_button.config(text="Resume")
             self.status_var.set("Paused")
         else:
+            self.engine.resume()
             self.pause_button.config(text="Pause")
             self.status_var.set("Running...")
 
     def stop_search(self):
-        if not self.is_running:
+        if not self.engine.is_running:
             return
             
-        self.is_running = False
+        # In-flight pages still finish; finish_search runs once they have
+        self.engine.stop()
+        self.pause_button.config(state=tk.DISABLED)
+        self.stop_button.config(state=tk.DISABLED)
         self.status_var.set("Stopping...")
-        
-        # Wait for threads to finish
-        for thread in self.active_threads:
-            if thread.is_alive():
-                thread.join(0.1)
-                
+
+    def finish_search(self):
+        # Log whatever the last pages reported
+        results = self.engine.drain_results()
+        if results:
+            self.log_messages(self.summarize_results(results))
+            
         # Save results
-        if self.valid_urls:
-            self.save_results()
+        self.save_results()
+            
+        # Log how much of the dork list was used
+        progress = self.engine.dork_source.progress()
+        self.log_message(f"Dorks: {progress['dorks']} from {progress['lines']} lines "
+                         f"({progress['duplicates']} duplicates skipped)")
+            
+        # Log filter breakdown
+        reasons, domain_hits = self.engine.filter_stats()
+        summary = ', '.join(f"{reason}: {count}" for reason, count in reasons.most_common())
+        if summary:
+            self.log_message(f"Filter stats - {summary}")
+        for domain, count in domain_hits.most_common(5):
+            self.log_message(f"Excluded {count} URLs from {domain}")
+        self.log_messages(self.engine.yield_report())
+        self.log_messages(self.engine.metrics_report())
+        if self.profile_file is not None:
+            self.save_profile()
             
         # Update UI
         self.start_button.config(state=tk.NORMAL)
@@ -349,191 +282,108 @@ class DorkParser:
         self.status_var.set("Search completed")
         
         # Show summary
-        messagebox.showinfo("Search Completed", f"Total valid URLs found: {len(self.valid_urls)}")
-
-    def monitor_progress(self):
-        """Monitor thread progress and handle completion"""
-        while self.is_running and any(t.is_alive() for t in self.active_threads):
-            time.sleep(0.5)
-            
-        if self.is_running:  # If not manually stopped
-            self.stop_search()
+        messagebox.showinfo("Search Completed", f"Total valid URLs found: {self.engine.valid_count}")
 
     def update_from_queue(self):
         """Update UI with data from the results queue"""
-        try:
-            # Process up to 10 items per update to keep UI responsive
-            for _ in range(10):
-                if self.results_queue.empty():
-                    break
-                    
-                result = self.results_queue.get_nowait()
-                
+        results = self.engine.drain_results(UI_BATCH)
+        if results:
+            self.log_messages(self.summarize_results(results))
+            
+        # Update URL count and how far through the dorks the run is
+        totals = self.engine.snapshot()
+        counts = f"URLs found: {totals['total']} | Valid URLs: {totals['valid']}"
+        if self.engine.dork_source is not None:
+            progress = self.engine.dork_source.progress()
+            done = '' if progress['fraction'] is None else f" ({progress['fraction']:.0%})"
+            counts = f"Dorks: {progress['dorks']}{done} | {counts}"
+        self.url_count_var.set(counts)
+        
+        if self.run_stopped.is_set():
+            self.run_stopped.clear()
+            self.finish_search()
+            
+        # Schedule next update
+        self.root.after(100, self.update_from_queue)
+
+    def summarize_results(self, results):
+        """Turn one batch of engine results into log lines"""
+        pages = [result for result in results if 'error' not in result]
+        errors = [result for result in results if 'error' in result]
+        
+        # Few enough to show one by one
+        if len(results) <= UI_DETAIL_LIMIT:
+            messages = []
+            for result in results:
                 if 'error' in result:
-                    # Log error
-                    self.log_message(f"Error in {result['engine']} for dork '{result['dork']}': {result['error']}")
+                    messages.append(f"Error in {result['engine']} for dork '{result['dork']}': {result['error']}")
                 else:
-                    # Log success
-                    self.log_message(
+                    messages.append(
                         f"{result['engine']} - Dork: '{result['dork']}' - "
                         f"Page {result['page']} - Found: {result['total']} - Valid: {result['valid']}"
                     )
-                
-                self.results_queue.task_done()
-        except queue.Empty:
-            pass
+            return messages
             
-        # Update URL count
-        total_urls = sum(stats['total'] for stats in self.engine_stats.values())
-        total_valid = sum(stats['valid'] for stats in self.engine_stats.values())
-        self.url_count_var.set(f"URLs found: {total_urls} | Valid URLs: {total_valid}")
-        
-        # Schedule next update
-        self.root.after(100, self.update_from_queue)
+        # Coalesce per engine
+        counters = {}
+        for result in pages:
+            counter = counters.setdefault(result['engine'], {'pages': 0, 'total': 0, 'valid': 0, 'errors': 0})
+            counter['pages'] += 1
+            counter['total'] += result['total']
+            counter['valid'] += result['valid']
+        for result in errors:
+            counter = counters.setdefault(result['engine'], {'pages': 0, 'total': 0, 'valid': 0, 'errors': 0})
+            counter['errors'] += 1
+            counter['last_error'] = result['error']
+            
+        messages = []
+        for engine_name, counter in counters.items():
+            message = (f"{engine_name} - {counter['pages']} pages - "
+                       f"Found: {counter['total']} - Valid: {counter['valid']}")
+            if counter['errors']:
+                message += f" - Errors: {counter['errors']} (last: {counter['last_error']})"
+            messages.append(message)
+        return messages
 
     def log_message(self, message):
         """Add a message to the progress text area"""
-        self.progress_text.insert(tk.END, f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
+        self.log_messages([message])
+
+    def log_messages(self, messages):
+        """Add several messages with one insert, keeping only the last LOG_LINES lines"""
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        messages = messages[-LOG_LINES:]
+        self.progress_text.insert(tk.END, ''.join(f"[{timestamp}] {message}\n" for message in messages))
+        
+        # Trim from the top; the text always ends with an empty line after the last newline
+        excess = int(self.progress_text.index('end-1c').split('.')[0]) - 1 - LOG_LINES
+        if excess > 0:
+            self.progress_text.delete('1.0', f'{excess + 1}.0')
         self.progress_text.see(tk.END)
 
     def save_results(self):
-        """Save valid URLs to a text file"""
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"results_{timestamp}.txt"
-        
+        """Finish the streamed results file"""
+        sink = self.engine.sink
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                for url in self.valid_urls:
-                    f.write(f"{url}\n")
-            self.log_message(f"Results saved to {filename}")
+            sink.close()
+            if self.engine.valid_count:
+                self.log_message(f"Results saved to {sink.path}")
+            else:
+                os.remove(sink.path)
         except Exception as e:
             self.log_message(f"Error saving results: {str(e)}")
 
-    def filter_urls(self, urls):
-        """Filter and validate URLs"""
-        # Exclude search engine domains and other unwanted URLs
-        excluded_domains = [
-            'google.com', 'bing.com', 'yahoo.com', 'duckduckgo.com', 'aol.com',
-            'yandex.com', 'naver.com', 'youtube.com', 'facebook.com', 'twitter.com',
-            'instagram.com', 'linkedin.com', 'pinterest.com'
-        ]
-        
-        valid_urls = []
-        for url in urls:
-            # Skip URLs from excluded domains
-            if any(domain in url.lower() for domain in excluded_domains):
-                continue
-                
-            # Basic URL validation
-            if not url.startswith(('http://', 'https://')):
-                continue
-                
-            # Add URL if it's not already in the list
-            if url not in self.valid_urls and url not in valid_urls:
-                valid_urls.append(url)
-                
-        return valid_urls
-
-    # Parser functions for different search engines
-    def parse_bing(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        urls = []
-        
-        # Find all search results
-        for result in soup.select('li.b_algo h2 a'):
-            if 'href' in result.attrs:
-                urls.append(result['href'])
-                
-        return urls
-
-    def parse_duckduckgo(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        urls = []
-        
-        # Find all result links
-        for result in soup.select('.result__a'):
-            if 'href' in result.attrs:
-                href = result['href']
-                if href.startswith('/'):
-                    continue
-                urls.append(href)
-                
-        return urls
-
-    def parse_yahoo(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        urls = []
-        
-        # Find all result links
-        for result in soup.select('.algo-sr a'):
-            if 'href' in result.attrs:
-                urls.append(result['href'])
-                
-        return urls
-
-    def parse_aol(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        urls = []
-        
-        # Find all result links
-        for result in soup.select('.algo-sr a'):
-            if 'href' in result.attrs:
-                urls.append(result['href'])
-                
-        return urls
-
-    def parse_google_api(self, json_content):
-        # This would parse JSON from Google API
-        # Note: This requires proper API key setup
+    def save_profile(self):
+        """Write the stage timing report and log its summary"""
         try:
-            data = json.loads(json_content)
-            urls = []
-            if 'items' in data:
-                for item in data['items']:
-                    if 'link' in item:
-                        urls.append(item['link'])
-            return urls
-        except:
-            return []
-
-    def parse_bing_news(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        urls = []
-        
-        # Find all news result links
-        for result in soup.select('.news-card a'):
-            if 'href' in result.attrs:
-                urls.append(result['href'])
-                
-        return urls
-
-    def parse_naver(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        urls = []
-        
-        # Find all result links
-        for result in soup.select('.total_wrap a.link_tit'):
-            if 'href' in result.attrs:
-                urls.append(result['href'])
-                
-        return urls
-
-    def parse_yandex(self, html_content):
-        soup = BeautifulSoup(html_content, 'html.parser')
-        urls = []
-        
-        # Find all result links
-        for result in soup.select('.organic__url'):
-            if 'href' in result.attrs:
-                urls.append(result['href'])
-                
-        return urls
+            self.engine.profiler.write_report(self.profile_file)
+            self.log_messages(self.engine.profiler.summary_lines())
+            self.log_message(f"Profile saved to {self.profile_file}")
+        except Exception as e:
+            self.log_message(f"Error saving profile: {str(e)}")
 
 # Run the application
 if __name__ == "__main__":
-    # Import missing modules
-    import json
-    
     root = tk.Tk()
     app = DorkParser(root)
     root.mainloop()
@@ -0,0 +1,286 @@
+"""Declarative search engine registry.
+
+Every engine is a plain dict of settings instead of code: a URL template,
+how pages map to the template, rate limits and an extractor. The built-in
+engines live in BUILTIN_ENGINES; more can come from JSON config files and
+from installed packages:
+
+    {
+        "Example": {
+            "url": "https://search.example.com/?q={dork}&start={offset}",
+            "pagination": {"start": 1, "step": 10},
+            "max_pages": 5,
+            "rate": 1.0, "burst": 2, "concurrency": 4,
+            "extractor": {"selector": "h3.result a"}
+        }
+    }
+
+    python dorkengine.py --engines-config engines.json -e Example -d dorks.txt
+
+The template fills in {dork} (already URL-quoted), {page} (0-based) and
+{offset} (pagination start + page * step). The extractor is one of
+{"selector": CSS, "skip_relative": bool} for HTML pages, {"json": PATH,
+"field": NAME} for JSON APIs, or {"callable": "module:function"}. Other
+keys (e.g. min_yield) are passed through to the scheduler as is, and
+limits left out (max_pages, rate, burst, concurrency) take its defaults.
+
+Packages register engines under the 'dorkparser.engines' entry point
+group; the entry point name is the engine name and it loads either such a
+dict or a ready-made engine config with a callable 'url' and 'parser'.
+Config files named in the DORK_ENGINES environment variable (os.pathsep
+separated) are read by default_registry(), so parser processes and shard
+workers see the same engines as the process that started them.
+
+Nothing is built until an engine is used: the registry knows every name
+up front, but an engine's extractor (or plugin module) is only set up on
+first lookup, so engines that are not selected cost nothing at startup.
+"""
+import importlib
+import os
+import sys
+from collections.abc import Mapping
+
+from dorkextract import SelectorExtractor, JSONExtractor, json_loads
+
+ENTRY_POINT_GROUP = 'dorkparser.engines'
+ENV_CONFIG = 'DORK_ENGINES'
+
+# Search engines configuration (rate is requests per second, burst the
+# token bucket size and concurrency the max in-flight requests per engine)
+BUILTIN_ENGINES = {
+    'Bing': {
+        'url': "https://www.bing.com/search?q={dork}&first={offset}&count=100",
+        'pagination': {'start': 1, 'step': 10},
+        'max_pages': 10,
+        'extractor': {'selector': 'li.b_algo h2 a'},
+        'rate': 1.0,
+        'burst': 2,
+        'concurrency': 4
+    },
+    'DuckDuckGo': {
+        'url': "https://html.duckduckgo.com/html/?q={dork}&s={offset}",
+        'pagination': {'start': 0, 'step': 30},
+        'max_pages': 5,
+        'extractor': {'selector': '.result__a', 'skip_relative': True},
+        'rate': 0.5,
+        'burst': 1,
+        'concurrency': 2
+    },
+    'Yahoo': {
+        'url': "https://search.yahoo.com/search?p={dork}&b={offset}",
+        'pagination': {'start': 1, 'step': 10},
+        'max_pages': 10,
+        'extractor': {'selector': '.algo-sr a'},
+        'rate': 1.0,
+        'burst': 2,
+        'concurrency': 4
+    },
+    'AOL': {
+        'url': "https://search.aol.com/aol/search?q={dork}&b={offset}",
+        'pagination': {'start': 1, 'step': 10},
+        'max_pages': 10,
+        'extractor': {'selector': '.algo-sr a'},
+        'rate': 1.0,
+        'burst': 2,
+        'concurrency': 4
+    },
+    'Google APIs': {
+        # Requires a Custom Search API key and engine id
+        'url': "https://www.googleapis.com/customsearch/v1?q={dork}&start={offset}&key=YOUR_API_KEY&cx=YOUR_CX_KEY",
+        'pagination': {'start': 1, 'step': 10},
+        'max_pages': 10,
+        'extractor': {'json': 'items', 'field': 'link'},
+        'rate': 1.0,
+        'burst': 2,
+        'concurrency': 4
+    },
+    'Bing News': {
+        'url': "https://www.bing.com/news/search?q={dork}&first={offset}",
+        'pagination': {'start': 1, 'step': 10},
+        'max_pages': 5,
+        'extractor': {'selector': '.news-card a'},
+        'rate': 1.0,
+        'burst': 2,
+        'concurrency': 4
+    },
+    'Naver': {
+        'url': "https://search.naver.com/search.naver?query={dork}&start={offset}",
+        'pagination': {'start': 1, 'step': 10},
+        'max_pages': 5,
+        'extractor': {'selector': '.total_wrap a.link_tit'},
+        'rate': 1.0,
+        'burst': 2,
+        'concurrency': 4
+    },
+    'Yandex': {
+        'url': "https://yandex.com/search/?text={dork}&p={page}",
+        'max_pages': 10,
+        'extractor': {'selector': '.organic__url'},
+        'rate': 0.5,
+        'burst': 1,
+        'concurrency': 2
+    }
+}
+
+class URLTemplate:
+    """Callable (dork, page=0) -> URL built from a template string; picklable"""
+
+    def __init__(self, template, start=0, step=1):
+        self.template = template
+        self.start = start
+        self.step = step
+
+    def __call__(self, dork, page=0):
+        return self.template.format(dork=dork, page=page, offset=self.start + page * self.step)
+
+    def __repr__(self):
+        return f"URLTemplate({self.template!r})"
+
+def load_callable(reference):
+    """Resolve 'package.module:attribute'"""
+    module_name, _, attribute = reference.partition(':')
+    if not module_name or not attribute:
+        raise ValueError(f"Expected 'module:attribute', got {reference!r}")
+    target = importlib.import_module(module_name)
+    for part in attribute.split('.'):
+        target = getattr(target, part)
+    return target
+
+def build_extractor(spec):
+    if 'selector' in spec:
+        return SelectorExtractor(spec['selector'], spec.get('attribute', 'href'),
+                                 spec.get('skip_relative', False), spec.get('backend'))
+    if 'json' in spec:
+        return JSONExtractor(spec['json'], spec.get('field', 'link'))
+    if 'callable' in spec:
+        return load_callable(spec['callable'])
+    raise ValueError(f"Extractor needs one of selector, json or callable: {spec!r}")
+
+def build_engine(name, spec):
+    """Engine config (callable url and parser, limits) from a declarative spec"""
+    if callable(spec.get('url')) and callable(spec.get('parser')):
+        # Already built, e.g. handed over by a plugin
+        config = dict(spec)
+    else:
+        for key in ('url', 'extractor'):
+            if key not in spec:
+                raise ValueError(f"Engine {name} is missing {key!r}")
+        config = {key: value for key, value in spec.items() if key not in ('pagination', 'extractor')}
+        pagination = spec.get('pagination') or {}
+        config['url'] = URLTemplate(spec['url'], pagination.get('start', 0), pagination.get('step', 1))
+        config['parser'] = build_extractor(spec['extractor'])
+    # Limits left out are filled in by dorkscheduler's defaults
+    return config
+
+def declares_entry_points(group=ENTRY_POINT_GROUP):
+    """Whether an installed distribution may declare group.
+
+    Reads the entry_points.txt files on sys.path directly: importing
+    importlib.metadata costs more than the rest of startup, and almost no
+    installation has any engine plugins. Path entries that are not plain
+    directories (zip files) answer True so the full scan decides.
+    """
+    marker = f"[{group}]"
+    for entry in sys.path:
+        directory = entry or os.curdir
+        try:
+            names = os.listdir(directory)
+        except NotADirectoryError:
+            return True
+        except OSError:
+            continue
+        for name in names:
+            if not name.endswith(('.dist-info', '.egg-info')):
+                continue
+            try:
+                with open(os.path.join(directory, name, 'entry_points.txt'), encoding='utf-8') as f:
+                    if marker in f.read():
+                        return True
+            except OSError:
+                continue
+    return False
+
+class EngineRegistry(Mapping):
+    """Read-only mapping of engine name -> engine config, built on first lookup.
+
+    Sources are specs (dicts), entry points or callables returning a spec;
+    later registrations replace earlier ones with the same name. defer()
+    postpones a discovery step (scanning entry points, reading config
+    files) until the registry is first read.
+    """
+
+    def __init__(self, specs=None):
+        self._sources = {}
+        self._built = {}
+        self._deferred = []
+        if specs:
+            for name, spec in specs.items():
+                self.register(name, spec)
+
+    def defer(self, discover):
+        self._deferred.append(discover)
+
+    def _discover(self):
+        while self._deferred:
+            self._deferred.pop(0)()
+
+    def register(self, name, source):
+        self._sources[name] = source
+        self._built.pop(name, None)
+
+    def load_config(self, path):
+        """Register every engine of a JSON config file, return their names"""
+        with open(path, 'rb') as f:
+            data = json_loads(f.read())
+        engines = data.get('engines', data) if isinstance(data, dict) else None
+        if not isinstance(engines, dict):
+            raise ValueError(f"{path}: expected an object of engine name -> settings")
+        for name, spec in engines.items():
+            self.register(name, spec)
+        return list(engines)
+
+    def load_entry_points(self, group=ENTRY_POINT_GROUP):
+        """Register the engines installed packages declare; nothing is imported yet"""
+        if not declares_entry_points(group):
+            return []
+        from importlib.metadata import entry_points
+        names = []
+        for entry_point in entry_points(group=group):
+            self.register(entry_point.name, entry_point.load)
+            names.append(entry_point.name)
+        return names
+
+    def __getitem__(self, name):
+        config = self._built.get(name)
+        if config is None:
+            self._discover()
+            source = self._sources[name]
+            spec = source() if callable(source) else source
+            if callable(spec):
+                # An entry point may load a factory rather than the spec itself
+                spec = spec()
+            config = self._built[name] = build_engine(name, spec)
+        return config
+
+    def __contains__(self, name):
+        self._discover()
+        return name in self._sources
+
+    def __iter__(self):
+        self._discover()
+        return iter(self._sources)
+
+    def __len__(self):
+        self._discover()
+        return len(self._sources)
+
+    def is_built(self, name):
+        return name in self._built
+
+def default_registry():
+    """Built-in engines, then installed plugins, then DORK_ENGINES config files"""
+    registry = EngineRegistry(BUILTIN_ENGINES)
+    registry.defer(registry.load_entry_points)
+    for path in filter(None, os.environ.get(ENV_CONFIG, '').split(os.pathsep)):
+        registry.defer(lambda path=path: registry.load_config(path))
+    return registry
@@ -0,0 +1,341 @@
+"""Profiling run mode: where a run's time goes, per engine and per stage.
+
+profiled(backend_class) returns a subclass of any engine backend that
+times every stage a page goes through:
+
+    wait    blocked on the scheduler (rate limits, backoff, pause)
+    fetch   request or cache read
+    parse   extracting links from the page
+    filter  validation, exclusion, dedup, sink and journal writes
+
+For each (engine, stage) the StageProfiler adds up calls, wall time and
+CPU time of the worker thread. Nested stages are exclusive: a page's
+parse time does not include the filter time inside it. Wall times are
+summed over the workers, so with 20 workers a 10s run can show 200s of
+wait; waits that end without a task (the run is over) are listed under
+engine '-'. Optionally:
+
+    allocations  net bytes allocated per stage, from tracemalloc. This is
+                 process wide, so it is only exact with one worker, and it
+                 slows the run down a lot
+    cprofile     a cProfile of every worker thread, merged into one
+                 .pstats file next to the report
+    sample       a stack sampler that records, every interval, the
+                 innermost function each worker is in and the stage it
+                 is running, at a cost of a few microseconds per sample
+
+At the end write_report() saves the breakdown as text, or as JSON when
+the path ends in .json:
+
+    python dorkengine.py -d dorks.txt -e Bing --profile profile.txt --profile-with sample
+
+The parse processes of the pipeline backend are not profiled: its parse
+stage measures the wait for the parser pool. The async backend awaits its
+fetches, so their CPU time belongs to the event loop and is not split out.
+"""
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from dorkcontrol import STOPPED
+
+STAGES = ('wait', 'fetch', 'parse', 'filter')
+PROFILE_OPTIONS = ('allocations', 'cprofile', 'sample')
+
+class _Totals:
+    """Stage totals and the open stage stack of one thread"""
+
+    def __init__(self):
+        # (engine, stage) -> [calls, wall, cpu, allocated bytes]
+        self.stages = {}
+        # [stage, engine, wall start, cpu start, alloc start, child wall, child cpu, child alloc]
+        self.stack = []
+
+    def add(self, engine_name, stage, wall, cpu, allocated):
+        entry = self.stages.get((engine_name, stage))
+        if entry is None:
+            entry = self.stages[(engine_name, stage)] = [0, 0.0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += wall
+        if cpu is not None:
+            entry[2] += cpu
+        entry[3] += allocated
+
+class StageProfiler:
+    """Per-thread stage timers, merged when a report is built"""
+
+    def __init__(self, allocations=False, cprofile=False, sample_interval=None):
+        self.allocations = allocations
+        self.cprofile = cprofile
+        self.sample_interval = sample_interval
+        self.lock = threading.Lock()
+        self.threads = {}
+        self.profiles = []
+        self.samples = Counter()
+        self.started = None
+        self.stopped = None
+        self._sampler = None
+        self._sampling = threading.Event()
+        self._local = threading.local()
+
+    def _totals(self):
+        totals = getattr(self._local, 'totals', None)
+        if totals is None:
+            totals = self._local.totals = _Totals()
+            with self.lock:
+                self.threads[threading.get_ident()] = totals
+        return totals
+
+    def _allocated(self):
+        if not self.allocations:
+            return 0
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[0]
+
+    def start(self):
+        with self.lock:
+            self.threads = {}
+            self.profiles = []
+            self.samples = Counter()
+        self._local = threading.local()
+        if self.allocations:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        self.started = time.perf_counter()
+        self.stopped = None
+        if self.sample_interval:
+            self._sampling.clear()
+            self._sampler = threading.Thread(target=self._sample, name='stage-sampler', daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        if self.stopped is not None:
+            return
+        self.stopped = time.perf_counter()
+        if self._sampler is not None:
+            self._sampling.set()
+            self._sampler.join()
+            self._sampler = None
+        if self.allocations:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+    def enter(self, stage, engine_name):
+        self._totals().stack.append([stage, engine_name, time.perf_counter(), time.thread_time(),
+                                     self._allocated(), 0.0, 0.0, 0])
+
+    def exit(self, engine_name=None):
+        """Close the innermost stage; engine_name fills in one that was not known on enter"""
+        wall_end, cpu_end, alloc_end = time.perf_counter(), time.thread_time(), self._allocated()
+        totals = self._totals()
+        stage, entered_engine, wall_start, cpu_start, alloc_start, child_wall, child_cpu, child_alloc = \
+            totals.stack.pop()
+        wall = wall_end - wall_start
+        cpu = cpu_end - cpu_start
+        allocated = alloc_end - alloc_start
+        totals.add(engine_name or entered_engine, stage, wall - child_wall, cpu - child_cpu,
+                   allocated - child_alloc)
+        if totals.stack:
+            parent = totals.stack[-1]
+            parent[5] += wall
+            parent[6] += cpu
+            parent[7] += allocated
+
+    def add(self, stage, engine_name, wall, cpu=None):
+        """Count a stage measured elsewhere, e.g. an awaited fetch"""
+        self._totals().add(engine_name, stage, wall, cpu, 0)
+
+    def in_stage(self, stage):
+        stack = self._totals().stack
+        return bool(stack) and stack[-1][0] == stage
+
+    def run_thread(self, target, *args):
+        """Run a worker thread's target, under cProfile when enabled"""
+        self._totals()
+        if not self.cprofile:
+            return target(*args)
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return target(*args)
+        finally:
+            profile.disable()
+            with self.lock:
+                self.profiles.append(profile)
+
+    def _sample(self):
+        while not self._sampling.wait(self.sample_interval):
+            frames = sys._current_frames()
+            with self.lock:
+                threads = list(self.threads.items())
+            for ident, totals in threads:
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = totals.stack
+                try:
+                    stage = stack[-1][0] if stack else 'other'
+                except IndexError:
+                    # Popped between the check and the read
+                    stage = 'other'
+                code = frame.f_code
+                where = f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                self.samples[(stage, where)] += 1
+
+    def report(self):
+        """{'elapsed', 'engines': {engine: {stage: {...}}}, 'samples': {stage: [[where, count]]}}"""
+        with self.lock:
+            threads = list(self.threads.values())
+        merged = {}
+        for totals in threads:
+            for key, values in dict.copy(totals.stages).items():
+                entry = merged.setdefault(key, [0, 0.0, 0.0, 0])
+                for index, value in enumerate(values):
+                    entry[index] += value
+        engines = {}
+        for (engine_name, stage), (calls, wall, cpu, allocated) in merged.items():
+            engines.setdefault(engine_name, {})[stage] = {
+                'calls': calls, 'wall': wall, 'cpu': cpu, 'mean_ms': wall / calls * 1000 if calls else 0.0,
+                'allocated': allocated if self.allocations else None
+            }
+        samples = {}
+        for (stage, where), count in self.samples.most_common():
+            samples.setdefault(stage, []).append([where, count])
+        end = self.stopped if self.stopped is not None else time.perf_counter()
+        return {'elapsed': end - self.started if self.started is not None else 0.0,
+                'threads': len(threads), 'engines': engines, 'samples': samples,
+                'options': [option for option, enabled in zip(PROFILE_OPTIONS, (
+                    self.allocations, self.cprofile, self.sample_interval)) if enabled]}
+
+    def summary_lines(self, report=None):
+        """Text table of the per-engine, per-stage breakdown"""
+        report = report or self.report()
+        lines = [f"Profile: {report['elapsed']:.2f}s elapsed, {report['threads']} worker threads "
+                 f"(wall and CPU are summed over them)",
+                 f"{'engine':<14} {'stage':<7} {'calls':>8} {'wall s':>10} {'mean ms':>9} {'cpu s':>9} {'alloc MB':>9}"]
+        for engine_name in sorted(report['engines'], key=str):
+            stages = report['engines'][engine_name]
+            for stage in sorted(stages, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES)):
+                entry = stages[stage]
+                allocated = '-' if entry['allocated'] is None else f"{entry['allocated'] / 1048576:.1f}"
+                lines.append(f"{str(engine_name):<14} {stage:<7} {entry['calls']:>8} {entry['wall']:>10.2f} "
+                             f"{entry['mean_ms']:>9.1f} {entry['cpu']:>9.2f} {allocated:>9}")
+        return lines
+
+    def write_report(self, path, top=25):
+        """Save the report (text, or JSON for .json paths) and return the paths written"""
+        report = self.report()
+        written = [path]
+        if self.profiles:
+            import pstats
+            stats_path = os.path.splitext(path)[0] + '.pstats'
+            with self.lock:
+                profiles = list(self.profiles)
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(stats_path)
+            report['cprofile'] = stats_path
+            written.append(stats_path)
+        if path.endswith('.json'):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, default=str)
+            return written
+
+        lines = self.summary_lines(report)
+        for stage, rows in report['samples'].items():
+            total = sum(count for _, count in rows)
+            lines.append('')
+            lines.append(f"Samples in {stage} ({total}):")
+            for where, count in rows[:top]:
+                lines.append(f"  {count / total:6.1%}  {where}")
+        if self.profiles:
+            text = io.StringIO()
+            stats.stream = text
+            stats.sort_stats('cumulative').print_stats(top)
+            lines.append('')
+            lines.append(f"cProfile, top {top} by cumulative time (full stats in {report['cprofile']}):")
+            lines.append(text.getvalue().rstrip())
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return written
+
+def profiled(backend_class):
+    """Subclass backend_class to time every stage with a StageProfiler (the profiler option)"""
+
+    class ProfiledEngine(backend_class):
+        def __init__(self, *args, profiler=None, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.profiler = profiler if profiler is not None else StageProfiler()
+
+        def start(self, dorks, selected_engines, concurrency=10):
+            self.profiler.start()
+            return super().start(dorks, selected_engines, concurrency)
+
+        def on_state(self, state):
+            super().on_state(state)
+            if state == STOPPED:
+                self.profiler.stop()
+
+        def _run_worker(self, target, *args):
+            return super()._run_worker(self.profiler.run_thread, target, *args)
+
+        def take_task(self):
+            self.profiler.enter('wait', None)
+            task = None
+            try:
+                task = super().take_task()
+                return task
+            finally:
+                self.profiler.exit(task.engine if task is not None else '-')
+
+        async def next_task(self):
+            # Other coroutines run stages on this thread meanwhile, so this one is not stacked
+            started = time.perf_counter()
+            task = await super().next_task()
+            self.profiler.add('wait', task.engine if task is not None else '-', time.perf_counter() - started)
+            return task
+
+        def fetch_page(self, url, engine_name=None):
+            self.profiler.enter('fetch', engine_name)
+            try:
+                return super().fetch_page(url, engine_name)
+            finally:
+                self.profiler.exit()
+
+        def record_response(self, engine_name, status, size, started):
+            super().record_response(engine_name, status, size, started)
+            if not self.profiler.in_stage('fetch'):
+                # Awaited by the async backend rather than run inside fetch_page
+                self.profiler.add('fetch', engine_name, time.perf_counter() - started)
+
+        def process_page(self, engine_name, dork, page, content):
+            self.profiler.enter('parse', engine_name)
+            try:
+                return super().process_page(engine_name, dork, page, content)
+            finally:
+                self.profiler.exit()
+
+        def parse(self, engine_name, content):
+            self.profiler.enter('parse', engine_name)
+            try:
+                return super().parse(engine_name, content)
+            finally:
+                self.profiler.exit()
+
+        def record_page(self, engine_name, dork, page, found_urls):
+            self.profiler.enter('filter', engine_name)
+            try:
+                return super().record_page(engine_name, dork, page, found_urls)
+            finally:
+                self.profiler.exit()
+
+    ProfiledEngine.__name__ = f"Profiled{backend_class.__name__}"
+    return ProfiledEngine
@@ -0,0 +1,349 @@
+"""Per-engine polite rate scheduling for DorkEngine workers.
+
+Every search engine gets a token bucket (requests per second plus a burst
+allowance) and a cap on concurrent requests. Workers ask the scheduler for
+the next (dork, engine, page) task that is allowed to run right now instead
+of sleeping a fixed random delay before each fetch, so a slow or throttled
+engine never holds up the others. 429/503 responses and Retry-After headers
+push the engine back for a while with exponential backoff.
+
+Pagination is adaptive. A (dork, engine) pair stops as soon as one of its
+pages adds fewer than the engine's min_yield new (deduplicated, valid)
+URLs. Every lane also keeps a yield curve: new URLs per page index,
+averaged over all dorks. Once a page index has enough samples and its mean
+is below min_yield, the lane stops requesting that page, except for an
+occasional probe that keeps the curve current.
+"""
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timezone
+
+# Defaults for engines that do not set their own limits
+DEFAULT_MAX_PAGES = 1
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 2
+DEFAULT_CONCURRENCY = 4
+# New URLs a page must add for the next page to be fetched; 0 only stops on empty pages
+DEFAULT_MIN_YIELD = 1
+
+THROTTLE_STATUSES = (429, 503)
+
+# task_done() outcomes
+RETRY = 'retry'
+NEXT_PAGE = 'next_page'
+DONE = 'done'
+
+# issued is the monotonic time the task was handed to a worker; a single
+# task (a failed page retried after a resume) never queues the next page
+Task = namedtuple('Task', 'dork engine page attempt issued single', defaults=(0.0, False))
+
+def parse_retry_after(value, now=None):
+    """Return the delay in seconds requested by a Retry-After header, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    # The HTTP-date form is rare, so its parser is only imported for it
+    from email.utils import parsedate_to_datetime
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+class TokenBucket:
+    """Classic token bucket; not thread-safe, the scheduler locks around it"""
+
+    def __init__(self, rate, burst):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+class EngineLane:
+    """Scheduling state for one search engine"""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.max_pages = config.get('max_pages', DEFAULT_MAX_PAGES)
+        self.bucket = TokenBucket(config.get('rate', DEFAULT_RATE), config.get('burst', DEFAULT_BURST))
+        self.max_concurrency = max(1, int(config.get('concurrency', DEFAULT_CONCURRENCY)))
+        self.min_yield = config.get('min_yield', DEFAULT_MIN_YIELD)
+        # Per page index: [pages seen, links found, new URLs]
+        self.curve = [[0, 0, 0] for _ in range(self.max_pages)]
+        self.stopped_early = 0
+        self.pruned = 0
+        self.probes = 0
+        self.pending = deque()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.backoff_level = 0
+        self.throttled = 0
+        # Memo of the is_cached answer for the task at the head of pending
+        self.checked = None
+        self.checked_cached = False
+
+    def delay(self, now):
+        """Seconds until this lane may start a task, None if it has nothing to run"""
+        if not self.pending or self.in_flight >= self.max_concurrency:
+            return None
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        return self.bucket.delay(now)
+
+    def record_yield(self, page, found, new):
+        point = self.curve[page]
+        point[0] += 1
+        point[1] += found
+        point[2] += new or 0
+
+    def worth_fetching(self, page, samples, explore_every):
+        """False if page has averaged below min_yield new URLs so far"""
+        pages, _, new = self.curve[page]
+        if self.min_yield <= 0 or pages < samples or new / pages >= self.min_yield:
+            return True
+        # Probe now and then; results may change as the dedup index fills
+        self.probes += 1
+        if self.probes % explore_every == 0:
+            return True
+        self.pruned += 1
+        return False
+
+class RateScheduler:
+    """Hands out (dork, engine, page) tasks while respecting every engine's limits.
+
+    next_dork is a callable returning the next dork string, or None once the
+    dorks are exhausted. New dorks are pulled only while fewer than
+    max_pending tasks are queued, so memory does not grow with the dork list.
+    start_page, if given, is called with (dork, engine) and returns the page
+    to start that pair from, or None to skip it (used to resume a journal).
+    retry_pages, if given, is called likewise and returns earlier pages to
+    fetch once more on their own, e.g. pages that failed before a resume.
+    is_cached, if given, is called with a task and returns True when its page
+    can be served without a request; such tasks bypass the rate limits.
+    A page index is pruned from an engine's yield curve once it has
+    yield_samples pages behind it; every explore_every-th pruned page is
+    fetched anyway.
+    """
+
+    def __init__(self, search_engines, selected_engines, next_dork, max_pending=1000,
+                 max_retries=3, backoff_base=5.0, backoff_max=300.0, start_page=None, is_cached=None,
+                 yield_samples=20, explore_every=10, retry_pages=None):
+        self.lanes = {name: EngineLane(name, search_engines[name]) for name in selected_engines}
+        self.next_dork = next_dork
+        self.start_page = start_page
+        self.retry_pages = retry_pages
+        self.is_cached = is_cached
+        self.yield_samples = yield_samples
+        self.explore_every = explore_every
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pending = 0
+        self.in_flight = 0
+        self.dorks_exhausted = False
+        self.closed = False
+        self.paused = False
+        self.listeners = []
+        self.condition = threading.Condition()
+
+    def _fill(self):
+        # Caller must hold the condition lock
+        while not self.dorks_exhausted and self.pending < self.max_pending:
+            dork = self.next_dork()
+            if dork is None:
+                self.dorks_exhausted = True
+                break
+            for lane in self.lanes.values():
+                if self.retry_pages is not None:
+                    for page in self.retry_pages(dork, lane.name):
+                        lane.pending.append(Task(dork, lane.name, page, 0, single=True))
+                        self.pending += 1
+                page = 0 if self.start_page is None else self.start_page(dork, lane.name)
+                if page is None or page >= lane.max_pages:
+                    continue
+                lane.pending.append(Task(dork, lane.name, page, 0))
+                self.pending += 1
+
+    def poll(self):
+        """Return (task, None) if a task may start now, else (None, delay).
+
+        delay is the number of seconds until some lane unblocks, or None
+        when the scheduler is paused or waiting only on in-flight tasks.
+        (None, None) with is_finished() true means there is nothing left to do.
+        """
+        with self.condition:
+            return self._poll(time.monotonic())
+
+    def _poll(self, now):
+        if self.closed or self.paused:
+            return None, None
+        self._fill()
+
+        # Cached pages cost no request, so they skip tokens and concurrency caps
+        if self.is_cached is not None:
+            for lane in self.lanes.values():
+                if lane.pending and self._head_cached(lane):
+                    return self._take(lane, now), None
+
+        best_delay = None
+        for lane in self.lanes.values():
+            delay = lane.delay(now)
+            if delay is None:
+                continue
+            if delay <= 0:
+                lane.bucket.take(now)
+                return self._take(lane, now), None
+            if best_delay is None or delay < best_delay:
+                best_delay = delay
+        return None, best_delay
+
+    def _head_cached(self, lane):
+        task = lane.pending[0]
+        if lane.checked is not task:
+            lane.checked = task
+            lane.checked_cached = self.is_cached(task)
+        return lane.checked_cached
+
+    def _take(self, lane, now):
+        lane.in_flight += 1
+        self.in_flight += 1
+        self.pending -= 1
+        return lane.pending.popleft()._replace(issued=now)
+
+    def is_finished(self):
+        return self.closed or (self.dorks_exhausted and self.pending == 0 and self.in_flight == 0)
+
+    def get(self, timeout=None):
+        """Block until a task may run and return it, or None when finished or closed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while True:
+                task, delay = self._poll(time.monotonic())
+                if task is not None:
+                    return task
+                if self.is_finished():
+                    return None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    delay = remaining if delay is None else min(delay, remaining)
+                self.condition.wait(delay)
+
+    def task_done(self, task, status=None, found=None, retry_after=None, new=None):
+        """Report the outcome of a task handed out by get()/poll().
+
+        status is the HTTP status (None on a network error), found the
+        number of links parsed from the page (None if it was not parsed)
+        and new how many of them were new valid URLs. The next page is
+        queued unless the page came back empty or below the engine's yield
+        threshold. Returns RETRY if the task was queued again to be retried
+        after a backoff, NEXT_PAGE if the following page was queued and
+        DONE if the pair's pagination has ended.
+        """
+        with self.condition:
+            lane = self.lanes[task.engine]
+            lane.in_flight -= 1
+            self.in_flight -= 1
+            now = time.monotonic()
+
+            if status in THROTTLE_STATUSES:
+                lane.throttled += 1
+                delay = min(self.backoff_max, self.backoff_base * (2 ** lane.backoff_level))
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.backoff_max))
+                lane.blocked_until = max(lane.blocked_until, now + delay)
+                lane.backoff_level += 1
+                if task.attempt < self.max_retries:
+                    lane.pending.appendleft(task._replace(attempt=task.attempt + 1))
+                    self.pending += 1
+                    self._notify()
+                    return RETRY
+            elif status is not None:
+                lane.backoff_level = 0
+
+            outcome = self._paginate(lane, task, found, new)
+            if outcome == NEXT_PAGE:
+                lane.pending.appendleft(Task(task.dork, task.engine, task.page + 1, 0))
+                self.pending += 1
+            self._notify()
+            return outcome
+
+    def _paginate(self, lane, task, found, new):
+        # Caller must hold the condition lock
+        if found is not None:
+            lane.record_yield(task.page, found, new)
+        if task.single:
+            return DONE
+        # If no results found on this page, stop paginating
+        if found == 0 or task.page + 1 >= lane.max_pages:
+            return DONE
+        # Stop once a page stops paying for itself
+        if new is not None and new < lane.min_yield:
+            lane.stopped_early += 1
+            return DONE
+        if not lane.worth_fetching(task.page + 1, self.yield_samples, self.explore_every):
+            return DONE
+        return NEXT_PAGE
+
+    def pause(self):
+        """Hand out no tasks until resume(); waiters sleep without waking up"""
+        with self.condition:
+            self.paused = True
+
+    def resume(self):
+        with self.condition:
+            self.paused = False
+            self._notify()
+
+    def close(self):
+        """Wake all waiters and make get() return None"""
+        with self.condition:
+            self.closed = True
+            self._notify()
+
+    def _notify(self):
+        # Caller must hold the condition lock
+        self.condition.notify_all()
+        for listener in self.listeners:
+            listener()
+
+    def stats(self):
+        with self.condition:
+            return {name: {'pending': len(lane.pending), 'in_flight': lane.in_flight,
+                           'throttled': lane.throttled, 'backoff_level': lane.backoff_level,
+                           'stopped_early': lane.stopped_early, 'pruned': lane.pruned}
+                    for name, lane in self.lanes.items()}
+
+    def yield_curves(self):
+        """Per engine, one dict per page index fetched at least once"""
+        with self.condition:
+            return {name: [{'page': page + 1, 'pages': pages, 'links': links, 'new': new,
+                            'mean_new': new / pages}
+                           for page, (pages, links, new) in enumerate(lane.curve) if pages]
+                    for name, lane in self.lanes.items()}
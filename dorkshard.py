@@ -0,0 +1,453 @@
+"""Sharded runs: one coordinator, any number of worker processes or hosts.
+
+The coordinator reads the dork list and hands it out in shards (chunks of
+shard_size dorks, each to be run on every selected engine) over an
+authenticated multiprocessing.connection socket, so no broker is needed.
+Each worker runs an ordinary engine with its own per-engine rate limits
+(and, on another host, its own IP's budget), pulls the next shard whenever
+its scheduler runs low and streams the valid URLs it finds back. The
+coordinator deduplicates them against one central index and writes the
+only result file. A shard counts as done once every (dork, engine) pair in
+it has finished paginating; the shards of a worker that disconnects before
+that are handed to the next worker that asks.
+
+    # coordinator plus 4 local worker processes
+    python dorkshard.py coordinator -d dorks.txt -e Bing -e Yahoo -o results.txt --local-workers 4
+
+    # or workers on other hosts (same key on both sides)
+    DORK_SHARD_KEY=secret python dorkshard.py coordinator -d dorks.txt --listen 0.0.0.0:7878 -o results.txt
+    DORK_SHARD_KEY=secret python dorkshard.py worker --connect coordinator-host:7878 -c 50 -b async
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import secrets
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+ENV_KEY = 'DORK_SHARD_KEY'
+DEFAULT_PORT = 7878
+
+def parse_address(value, default_host='127.0.0.1'):
+    """'host:port', ':port' or 'port' -> (host, port)"""
+    host, _, port = value.rpartition(':')
+    return host or default_host, int(port)
+
+def is_loopback(host):
+    try:
+        return socket.gethostbyname(host).startswith('127.')
+    except OSError:
+        return False
+
+class Coordinator:
+    """Hands out shards, tracks which are done and merges the workers' URLs.
+
+    dorks is a dorksource.DorkSource (or any iterable of dorks), sink a
+    dorksink.ResultSink for the deduplicated URLs; the caller closes it.
+    max_per_host caps the URLs any one host contributes across all workers.
+    """
+
+    def __init__(self, dorks, engines, sink, address=('127.0.0.1', DEFAULT_PORT), authkey=None,
+                 shard_size=100, max_per_host=None):
+        from dorkengine import URLIndex
+        from dorkstore import ResultStore
+        from dorksource import DorkSource
+
+        self.source = dorks if isinstance(dorks, DorkSource) else DorkSource.from_iterable(dorks)
+        self.engines = list(engines)
+        self.sink = sink
+        self.address = address
+        self.authkey = authkey if authkey is not None else secrets.token_bytes(16)
+        self.shard_size = shard_size
+        self.url_index = URLIndex()
+        self.host_caps = ResultStore(max_per_host, keep_urls=False) if max_per_host is not None else None
+        self.condition = threading.Condition()
+        self.listener = None
+        self.closing = False
+        self.handlers = []
+        self.shard_ids = itertools.count()
+        self.worker_ids = itertools.count(1)
+        self.requeued = deque()
+        # shard id -> (worker id, dorks)
+        self.assigned = {}
+        self.source_exhausted = False
+        self.shards_done = 0
+        self.shards_reassigned = 0
+        self.workers = 0
+        self.received = 0
+        self.accepted = 0
+
+    def start(self):
+        """Listen and serve workers on background threads"""
+        self.listener = Listener(self.address, authkey=self.authkey)
+        self.address = self.listener.address
+        threading.Thread(target=self._accept, name='shard-accept', daemon=True).start()
+        return self.address
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                # A client that failed authentication, or the wakeup from close()
+                if self.closing:
+                    return
+                continue
+            if self.closing:
+                conn.close()
+                return
+            thread = threading.Thread(target=self._serve, args=(conn,), daemon=True)
+            thread.start()
+            self.handlers.append(thread)
+
+    def _serve(self, conn):
+        worker_id = next(self.worker_ids)
+        with self.condition:
+            self.workers += 1
+        try:
+            while True:
+                message = conn.recv()
+                kind = message[0]
+                if kind == 'hello':
+                    conn.send(('config', {'engines': self.engines, 'worker_id': worker_id}))
+                elif kind == 'shard':
+                    conn.send(self.next_shard(worker_id, block=message[1]))
+                elif kind == 'urls':
+                    self.merge(*message[1:])
+                elif kind == 'shard_done':
+                    self.shard_done(message[1])
+                elif kind == 'bye':
+                    return
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            self.worker_lost(worker_id)
+
+    def _finished(self):
+        # Caller must hold the condition lock
+        return self.source_exhausted and not self.requeued and not self.assigned
+
+    def next_shard(self, worker_id, block=False):
+        """('shard', id, dorks), ('idle',) if none is free right now, or ('done',)"""
+        with self.condition:
+            while True:
+                if self.requeued:
+                    shard_id, dorks = self.requeued.popleft()
+                else:
+                    shard_id, dorks = None, None
+                    if not self.source_exhausted:
+                        dorks = self.source.next_chunk(self.shard_size)
+                        if dorks:
+                            shard_id = next(self.shard_ids)
+                        else:
+                            self.source_exhausted = True
+                            self.condition.notify_all()
+                if dorks:
+                    self.assigned[shard_id] = (worker_id, dorks)
+                    return ('shard', shard_id, dorks)
+                if self._finished() or self.closing:
+                    return ('done',)
+                if not block:
+                    return ('idle',)
+                # Another worker may still fail and give its shards back
+                self.condition.wait()
+
+    def shard_done(self, shard_id):
+        with self.condition:
+            if self.assigned.pop(shard_id, None) is not None:
+                self.shards_done += 1
+            self.condition.notify_all()
+
+    def worker_lost(self, worker_id):
+        """Put the unfinished shards of a disconnected worker back in line"""
+        with self.condition:
+            self.workers -= 1
+            for shard_id, (owner, dorks) in list(self.assigned.items()):
+                if owner == worker_id:
+                    del self.assigned[shard_id]
+                    self.requeued.append((shard_id, dorks))
+                    self.shards_reassigned += 1
+            self.condition.notify_all()
+
+    def merge(self, engine_name, dork, page, urls):
+        """Central dedup: only URLs no worker has reported before reach the sink"""
+        new_urls = [url for url in urls if self.url_index.add(url)]
+        if self.host_caps is not None:
+            new_urls = self.host_caps.extend(new_urls)
+        with self.condition:
+            self.received += len(urls)
+            self.accepted += len(new_urls)
+        if new_urls:
+            self.sink.write(new_urls, engine_name, dork, page)
+
+    def wait(self, timeout=None):
+        """Block until every shard is done, return True if it is"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while not self._finished():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+    def close(self, timeout=5.0):
+        """Stop listening and wait for connected workers to say goodbye"""
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        if self.listener is not None:
+            # A blocked accept() does not notice the socket closing, so wake it with a connection
+            try:
+                socket.create_connection(self.address, timeout=1).close()
+            except OSError:
+                pass
+            self.listener.close()
+        deadline = time.monotonic() + timeout
+        for thread in list(self.handlers):
+            thread.join(max(0, deadline - time.monotonic()))
+        self.source.close()
+
+    def stats(self):
+        capped = self.host_caps.capped if self.host_caps is not None else 0
+        with self.condition:
+            return {'shards_done': self.shards_done, 'shards_reassigned': self.shards_reassigned,
+                    'shards_outstanding': len(self.assigned) + len(self.requeued),
+                    'workers': self.workers, 'urls_received': self.received,
+                    'urls_accepted': self.accepted, 'capped': capped,
+                    'duplicates': self.received - self.accepted - capped}
+
+class CoordinatorLink:
+    """A worker's connection to the coordinator, shared by its threads"""
+
+    def __init__(self, address, authkey):
+        self.conn = Client(address, authkey=authkey)
+        self.lock = threading.Lock()
+
+    def request(self, message):
+        with self.lock:
+            self.conn.send(message)
+            return self.conn.recv()
+
+    def send(self, message):
+        with self.lock:
+            self.conn.send(message)
+
+    def close(self):
+        with self.lock:
+            try:
+                self.conn.send(('bye',))
+            except OSError:
+                pass
+            self.conn.close()
+
+class RemoteSink:
+    """ResultSink stand-in that forwards a worker's valid URLs to the coordinator"""
+
+    def __init__(self, link):
+        self.link = link
+        self.count = 0
+
+    def write(self, urls, engine=None, dork=None, page=None):
+        if urls:
+            self.link.send(('urls', engine, dork, page, list(urls)))
+            self.count += len(urls)
+
+    def close(self):
+        pass
+
+class ShardFeed:
+    """Iterable of the dorks of every shard a worker takes during one engine run.
+
+    The first shard is taken with a blocking request before the run starts;
+    later ones are asked for only when the engine needs more dorks, and the
+    run ends (and the worker asks again) when none is free right now.
+    """
+
+    def __init__(self, link, engine_count):
+        self.link = link
+        self.engine_count = engine_count
+        self.lock = threading.Lock()
+        # shard id -> (dork, engine) pairs still paginating; dork -> shard id
+        self.remaining = {}
+        self.dork_shard = {}
+        self.first = None
+
+    def wait_first(self):
+        """Block for the first shard, False once the coordinator is done"""
+        reply = self.link.request(('shard', True))
+        if reply[0] != 'shard':
+            return False
+        self.first = reply
+        return True
+
+    def _take(self, reply):
+        _, shard_id, dorks = reply
+        with self.lock:
+            self.remaining[shard_id] = len(dorks) * self.engine_count
+            for dork in dorks:
+                self.dork_shard[dork] = shard_id
+        return dorks
+
+    def __iter__(self):
+        reply, self.first = self.first, None
+        while reply is not None and reply[0] == 'shard':
+            yield from self._take(reply)
+            reply = self.link.request(('shard', False))
+
+    def pair_done(self, dork):
+        """One (dork, engine) pair finished; reports the shard once all of its pairs have"""
+        with self.lock:
+            shard_id = self.dork_shard.get(dork)
+            if shard_id is None:
+                return
+            self.remaining[shard_id] -= 1
+            if self.remaining[shard_id] > 0:
+                return
+            del self.remaining[shard_id]
+            for key in [key for key, value in self.dork_shard.items() if value == shard_id]:
+                del self.dork_shard[key]
+        self.link.send(('shard_done', shard_id))
+
+def shard_worker(backend_class):
+    """Subclass backend_class to report finished (dork, engine) pairs to a ShardFeed"""
+    from dorkscheduler import DONE
+
+    class ShardWorkerEngine(backend_class):
+        def __init__(self, *args, feed=None, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.feed = feed
+
+        def finish_task(self, task, status, found, retry_after, new=None):
+            outcome = super().finish_task(task, status, found, retry_after, new)
+            # Pages cut short by stop are not done; their shard goes to another worker
+            if outcome == DONE and self.is_running:
+                self.feed.pair_done(task.dork)
+            return outcome
+
+    ShardWorkerEngine.__name__ = f"ShardWorker{backend_class.__name__}"
+    return ShardWorkerEngine
+
+def run_worker(address, authkey, backend='threads', concurrency=10, on_result=None, **options):
+    """Work shards from the coordinator at address until it has none left"""
+    import dorkengine
+    from dorksource import DorkSource
+
+    link = CoordinatorLink(address, authkey)
+    try:
+        _, config = link.request(('hello',))
+        engines = config['engines']
+        engine_class = shard_worker(dorkengine.ENGINE_BACKENDS[backend])
+        sink = RemoteSink(link)
+        while True:
+            feed = ShardFeed(link, len(engines))
+            if not feed.wait_first():
+                break
+            # Queue only enough tasks to keep the workers busy, leaving the other shards to other workers
+            options.setdefault('max_pending', max(2 * concurrency, len(engines)))
+            dorkengine.run(DorkSource.from_iterable(feed, dedupe=False, chunk_size=1), engines, concurrency,
+                           on_result=on_result, backend=engine_class, sink=sink, feed=feed, **options)
+        return sink.count
+    finally:
+        link.close()
+
+def _local_worker(address, authkey, backend, concurrency):
+    run_worker(address, authkey, backend, concurrency)
+
+def main(argv=None):
+    import dorkengine
+
+    parser = argparse.ArgumentParser(description="Split a dork run across worker processes or hosts.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator = commands.add_parser('coordinator', help="hand out shards and collect results")
+    coordinator.add_argument('-d', '--dorks', action='append',
+                             help="dork file, plain or gzip; may be repeated ('-' for stdin, the default)")
+    coordinator.add_argument('-e', '--engine', action='append', dest='engines',
+                             help="search engine to use, may be repeated (default: all)")
+    coordinator.add_argument('-o', '--output', default='-', help="result file ('-' for stdout, the default)")
+    coordinator.add_argument('-f', '--format', help="output format (text or ndjson)")
+    coordinator.add_argument('--listen', default=f"127.0.0.1:{DEFAULT_PORT}", metavar='HOST:PORT',
+                             help=f"address workers connect to (default: 127.0.0.1:{DEFAULT_PORT})")
+    coordinator.add_argument('--shard-size', type=int, default=100, help="dorks per shard (default: 100)")
+    coordinator.add_argument('--max-per-host', type=int, metavar='N',
+                             help="keep at most N URLs from any one host (default: no cap)")
+    coordinator.add_argument('--local-workers', type=int, default=0,
+                             help="worker processes to start on this host")
+    coordinator.add_argument('-c', '--concurrency', type=int, default=10,
+                             help="workers per local worker process (default: 10)")
+    coordinator.add_argument('-b', '--backend', choices=sorted(dorkengine.ENGINE_BACKENDS), default='threads',
+                             help="backend of local workers (default: threads)")
+
+    worker = commands.add_parser('worker', help="run shards from a coordinator")
+    worker.add_argument('--connect', default=f"127.0.0.1:{DEFAULT_PORT}", metavar='HOST:PORT',
+                        help=f"coordinator address (default: 127.0.0.1:{DEFAULT_PORT})")
+    worker.add_argument('-c', '--concurrency', type=int, default=10, help="number of workers (default: 10)")
+    worker.add_argument('-b', '--backend', choices=sorted(dorkengine.ENGINE_BACKENDS), default='threads',
+                        help="worker model (default: threads)")
+    worker.add_argument('-q', '--quiet', action='store_true', help="do not log progress to stderr")
+    args = parser.parse_args(argv)
+
+    key = os.environ.get(ENV_KEY)
+    authkey = key.encode('utf-8') if key else None
+
+    if args.command == 'worker':
+        if authkey is None:
+            parser.error(f"set {ENV_KEY} to the coordinator's key")
+
+        def on_result(result):
+            if not args.quiet and 'error' in result:
+                print(f"Error in {result['engine']} for dork '{result['dork']}': {result['error']}", file=sys.stderr)
+
+        count = run_worker(parse_address(args.connect), authkey, args.backend, args.concurrency, on_result)
+        if not args.quiet:
+            print(f"Sent {count} valid URLs", file=sys.stderr)
+        return 0
+
+    from dorksink import ResultSink
+    from dorksource import DorkSource
+
+    host, port = parse_address(args.listen)
+    if authkey is None and not is_loopback(host):
+        parser.error(f"set {ENV_KEY} when listening on a non-loopback address")
+    engines = args.engines or list(dorkengine.SEARCH_ENGINES.keys())
+    unknown = [engine for engine in engines if engine not in dorkengine.SEARCH_ENGINES]
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(unknown)}")
+
+    sink = ResultSink(args.output, args.format, flush_interval=0 if args.output == '-' else 1.0)
+    coordinator = Coordinator(DorkSource(args.dorks or ['-']), engines, sink, (host, port), authkey,
+                              args.shard_size, args.max_per_host)
+    address = coordinator.start()
+    print(f"Coordinator listening on {address[0]}:{address[1]}", file=sys.stderr)
+
+    # spawn rather than fork: the coordinator already has threads running
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=_local_worker, daemon=True,
+                                 args=(address, coordinator.authkey, args.backend, args.concurrency))
+                 for _ in range(args.local_workers)]
+    for process in processes:
+        process.start()
+    try:
+        coordinator.wait()
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        coordinator.close()
+        for process in processes:
+            process.join(5)
+        sink.close()
+
+    stats = coordinator.stats()
+    print(f"{stats['shards_done']} shards done ({stats['shards_reassigned']} reassigned), "
+          f"{stats['urls_accepted']} unique URLs of {stats['urls_received']} received", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""Streaming, append-only result files.
+
+ResultSink takes batches of (already deduplicated) valid URLs from the
+workers and writes them on a single background thread, so results reach the
+disk while the run is still going and nothing has to be kept in memory.
+Writes are buffered, the buffer is flushed every flush_interval seconds and
+fsync'ed every fsync_interval seconds, so a crash or kill loses at most the
+last few seconds of results.
+
+when_durable(callback) queues a callback behind the URLs written so far;
+the writer thread runs it once those are flushed and fsync'ed (fsyncing
+at flush_interval while callbacks wait), then calls every after_sync
+hook. DorkEngine uses this to journal a page only once its URLs are on
+disk, and to commit the journal right after.
+
+Formats:
+    text    one URL per line
+    ndjson  one JSON object per line with url, engine, dork, page and time
+
+A path ending in .gz is gzip compressed. Each flush completes a gzip
+member, so everything up to the last flush stays readable after a crash,
+and repair_gzip() cuts off the unfinished member a crash leaves behind
+before a resumed run appends to the file (gzip readers stop at it, so
+everything appended after it would be lost). '-' writes to stdout.
+"""
+import gzip
+import json
+import os
+import queue
+import stat
+import sys
+import threading
+import time
+import zlib
+
+FORMATS = ('text', 'ndjson')
+
+_IDLE = object()
+
+def guess_format(path):
+    """ndjson for .ndjson/.jsonl paths (optionally .gz), text otherwise"""
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'text'
+
+def repair_gzip(path):
+    """Cut a gzip file back to its last complete member; returns True if anything was cut.
+
+    A member is only complete once its URLs are flushed and fsync'ed, and
+    a journal records a page only after that, so a resumed run fetches the
+    pages of a cut-off member again.
+    """
+    size = os.path.getsize(path)
+    end = start = 0
+    decompressor = zlib.decompressobj(wbits=31)
+    with open(path, 'r+b') as f:
+        try:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                while chunk:
+                    decompressor.decompress(chunk)
+                    if not decompressor.eof:
+                        start += len(chunk)
+                        break
+                    # A whole member, trailer (CRC and length) included
+                    end = start = start + len(chunk) - len(decompressor.unused_data)
+                    chunk = decompressor.unused_data
+                    decompressor = zlib.decompressobj(wbits=31)
+        except zlib.error:
+            # Corrupt data; no gzip reader gets past it either
+            pass
+        if end == size:
+            return False
+        f.truncate(end)
+        f.flush()
+        os.fsync(f.fileno())
+    return True
+
+class ResultSink:
+    """Append-only writer fed from any number of worker threads"""
+
+    def __init__(self, path, format=None, compress=None, flush_interval=1.0, fsync_interval=5.0,
+                 max_pending=10000):
+        self.path = path
+        self.format = format or guess_format(path)
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown result format: {self.format}")
+        self.compress = path.endswith('.gz') if compress is None else compress
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        self.closed = False
+        self.error = None
+        self.queue = queue.Queue(max_pending)
+        # Called on the writer thread after the callbacks of each sync, e.g. a journal commit
+        self.after_sync = []
+
+        self.repaired = False
+        if path == '-':
+            self.raw = None
+            self.file = getattr(sys.stdout, 'buffer', sys.stdout)
+        else:
+            if self.compress and os.path.isfile(path):
+                self.repaired = repair_gzip(path)
+            self.raw = self.file = open(path, 'ab', buffering=1 << 20)
+        # Gzip member being written, started on the first write after a flush
+        self.member = None
+        # Devices and pipes (e.g. /dev/null) cannot be fsync'ed
+        self.syncable = self.raw is not None and stat.S_ISREG(os.fstat(self.raw.fileno()).st_mode)
+
+        self.thread = threading.Thread(target=self._run, name='result-sink', daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, urls, engine=None, dork=None, page=None):
+        """Queue a batch of URLs; blocks only if the writer falls far behind"""
+        if self.error is not None:
+            raise self.error
+        if self.closed:
+            raise ValueError("Result sink is closed")
+        if urls:
+            self.queue.put((urls, engine, dork, page, time.time()))
+
+    def when_durable(self, callback):
+        """Call callback (on the writer thread) once every URL queued before it is on disk.
+
+        It is never called if writing fails, since those URLs may be lost.
+        """
+        if self.closed:
+            # Everything is synced once the writer thread has finished
+            self.thread.join()
+            if self.error is None:
+                callback()
+        elif self.error is None:
+            self.queue.put(callback)
+
+    def _durable(self, waiting):
+        for callback in waiting:
+            callback()
+        waiting.clear()
+        for hook in self.after_sync:
+            hook()
+
+    def _encode(self, item):
+        urls, engine, dork, page, when = item
+        if self.format == 'text':
+            lines = ''.join(f"{url}\n" for url in urls)
+        else:
+            lines = ''.join(json.dumps({'url': url, 'engine': engine, 'dork': dork, 'page': page,
+                                        'time': round(when, 3)}, ensure_ascii=False) + '\n'
+                            for url in urls)
+        return lines.encode('utf-8')
+
+    def _write(self, data):
+        if not self.compress:
+            self.file.write(data)
+            return
+        if self.member is None:
+            self.member = gzip.GzipFile(fileobj=self.file, mode='ab')
+        self.member.write(data)
+
+    def _flush(self, sync):
+        if self.member is not None:
+            # Writes the member's trailer; the file object stays open
+            self.member.close()
+            self.member = None
+        self.file.flush()
+        if sync and self.syncable:
+            os.fsync(self.raw.fileno())
+
+    def _run(self):
+        last_flush = last_sync = time.monotonic()
+        unflushed = unsynced = False
+        # when_durable callbacks whose URLs are written but not yet on disk
+        waiting = []
+        try:
+            while True:
+                # Waiting callbacks should not sit out a whole fsync interval
+                sync_interval = self.flush_interval if waiting else self.fsync_interval
+                if unflushed:
+                    timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+                elif unsynced:
+                    timeout = max(0.0, last_sync + sync_interval - time.monotonic())
+                else:
+                    timeout = None
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = _IDLE
+                if item is None:
+                    break
+                if callable(item):
+                    waiting.append(item)
+                    sync_interval = self.flush_interval
+                elif item is not _IDLE:
+                    self._write(self._encode(item))
+                    self.count += len(item[0])
+                    unflushed = True
+                    unsynced = self.syncable
+
+                now = time.monotonic()
+                if unsynced and now - last_sync >= sync_interval:
+                    self._flush(True)
+                    last_flush = last_sync = now
+                    unflushed = unsynced = False
+                elif unflushed and now - last_flush >= self.flush_interval:
+                    self._flush(False)
+                    last_flush = now
+                    unflushed = False
+                if waiting and not unflushed and not unsynced:
+                    # Everything written so far, and so every waiting callback's URLs, is on disk
+                    self._durable(waiting)
+        except Exception as e:
+            self.error = e
+            # Keep draining so writers never block on a dead sink
+            while self.queue.get() is not None:
+                pass
+        finally:
+            try:
+                self._flush(True)
+                if self.error is None and waiting:
+                    self._durable(waiting)
+            finally:
+                if self.raw is not None:
+                    self.raw.close()
+
+    def close(self):
+        """Write everything queued, fsync and close the file"""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,165 @@
+"""Lazy, deduplicating dork sources.
+
+DorkSource streams dorks from one or more files without reading them into
+memory: plain text or gzip (detected from the magic bytes, so a .gz suffix
+is optional), '-' for stdin. Lines are stripped at both ends but the
+query itself is kept as written, blank lines are dropped and repeats are
+skipped using 8-byte fingerprints, so a multi-million-line file costs a
+few dozen bytes per distinct dork.
+
+Workers take dorks in chunks with next_chunk(), and progress() reports how
+far through the input the source is, in bytes and lines:
+
+    source = DorkSource(['dorks.txt.gz', 'more.txt'])
+    while True:
+        chunk = source.next_chunk(500)
+        if not chunk:
+            break
+        ...
+    print(source.progress())
+"""
+import gzip
+import hashlib
+import os
+import sys
+import threading
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+def normalize_dork(line):
+    """Strip the line ends; returns '' for blank lines"""
+    return line.strip()
+
+class DorkSource:
+    """Thread-safe, single-pass iterator over the distinct dorks of some files"""
+
+    def __init__(self, paths, dedupe=True, chunk_size=1000, encoding='utf-8'):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.dedupe = dedupe
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.lock = threading.Lock()
+        self.seen = set()
+        self.lines = 0
+        self.dorks = 0
+        self.duplicates = 0
+        self.bytes_done = 0
+        self.total_bytes = self._total_bytes()
+        self.total_lines = None
+        self.exhausted = False
+        self.closed = False
+        # Dork read ahead by peek(), handed out next
+        self._peeked = None
+        self._lines = self._read_lines()
+
+    @classmethod
+    def from_iterable(cls, dorks, dedupe=True, chunk_size=1000):
+        """Source over an in-memory iterable of dork strings (e.g. a list or the GUI text box)"""
+        source = cls([], dedupe, chunk_size)
+        source.total_bytes = None
+        if hasattr(dorks, '__len__'):
+            source.total_lines = len(dorks)
+        source._lines = iter(dorks)
+        return source
+
+    def _total_bytes(self):
+        total = 0
+        for path in self.paths:
+            if path == '-':
+                return None
+            total += os.path.getsize(path)
+        return total
+
+    def _open(self, path):
+        raw = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        if raw.peek(2)[:2] == GZIP_MAGIC:
+            return raw, gzip.GzipFile(fileobj=raw, mode='rb')
+        return raw, None
+
+    def _read_lines(self):
+        offset = 0
+        for path in self.paths:
+            raw, unpacked = self._open(path)
+            try:
+                seekable = path != '-'
+                for line in (unpacked or raw):
+                    # Offset in the file as stored, so gzip progress matches its size on disk
+                    self.bytes_done = offset + raw.tell() if seekable else self.bytes_done + len(line)
+                    yield line.decode(self.encoding, errors='replace')
+                if seekable:
+                    offset += os.path.getsize(path)
+                    self.bytes_done = offset
+            finally:
+                if unpacked:
+                    unpacked.close()
+                if path != '-':
+                    raw.close()
+
+    def _next(self):
+        # Caller must hold the lock
+        if self.closed:
+            return None
+        if self._peeked is not None:
+            dork, self._peeked = self._peeked, None
+            return dork
+        for line in self._lines:
+            self.lines += 1
+            dork = normalize_dork(line.lstrip('\ufeff'))
+            if not dork:
+                continue
+            if self.dedupe:
+                key = hashlib.blake2b(dork.encode('utf-8'), digest_size=8).digest()
+                if key in self.seen:
+                    self.duplicates += 1
+                    continue
+                self.seen.add(key)
+            self.dorks += 1
+            return dork
+        self.exhausted = True
+        return None
+
+    def peek(self):
+        """The next dork without taking it, or None if there are none left"""
+        with self.lock:
+            if self._peeked is None:
+                self._peeked = self._next()
+            return self._peeked
+
+    def next_chunk(self, size=None):
+        """Up to size (default chunk_size) new dorks; an empty list once exhausted"""
+        size = size or self.chunk_size
+        chunk = []
+        with self.lock:
+            while len(chunk) < size:
+                dork = self._next()
+                if dork is None:
+                    break
+                chunk.append(dork)
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.next_chunk()
+            if not chunk:
+                return
+            yield from chunk
+
+    def close(self):
+        """Stop reading and close the current file"""
+        with self.lock:
+            if hasattr(self._lines, 'close'):
+                self._lines.close()
+            self.closed = True
+
+    def progress(self):
+        """Counters for the input consumed so far; fraction is None when the size is unknown"""
+        fraction = None
+        if self.exhausted:
+            fraction = 1.0
+        elif self.total_bytes:
+            fraction = min(1.0, self.bytes_done / self.total_bytes)
+        elif self.total_lines:
+            fraction = min(1.0, self.lines / self.total_lines)
+        return {'lines': self.lines, 'dorks': self.dorks, 'duplicates': self.duplicates,
+                'bytes': self.bytes_done, 'total_bytes': self.total_bytes, 'fraction': fraction,
+                'done': self.exhausted, 'closed': self.closed}
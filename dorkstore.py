@@ -0,0 +1,287 @@
+"""Compact in-memory store for result URLs, indexed and capped per host.
+
+A list of URL strings costs a pointer plus a full str object (about 50
+bytes of header) per URL, and repeats the scheme and host every time.
+ResultStore keeps URLs in columns instead:
+
+    head    array('I')   id into a table of interned 'scheme://host' strings
+    rest    bytearray    UTF-8 path, query and fragment of every URL plus a
+                         newline, back to back
+    end     array('Q')   where each URL's rest ends in that bytearray
+
+so a URL costs 12 bytes plus its path, and one copy of its scheme and host
+is shared by every URL on it. Hosts are lowercased (with the port, if
+any) and every head maps to a host, which is what caps and the index use.
+max_per_host caps how many URLs a single host may contribute; add() and
+extend() report which URLs were accepted, so hosts that return hundreds
+of near-identical pages do not take over the output.
+
+The per-host index (urls_for(), by_host(), export(group_by_host=True)) is
+built on demand by a stable sort of the URL positions by host, and kept
+until the next add. DorkEngine.save_results(group_by_host=True) and the
+command line's --group-by-host write results through it.
+
+The saving is modest and not free. With 1M search-result-like URLs over
+about 200k hosts (python dorkstore.py --bench 1000000):
+
+    list    112.7 MB   export 0.19 s
+    store    93.5 MB   export 0.80 s (2.3 s grouped by host), about 5 us per add
+
+and every add() / extend() takes the store's lock. DorkEngine therefore
+keeps a plain list unless asked for compact_results, and uses a
+count-only store (keep_urls=False) just to enforce max_per_host.
+
+    python dorkstore.py --bench 10000000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from array import array
+from itertools import accumulate, chain, repeat
+
+def split_url(url):
+    """Return (scheme prefix, host, rest) with the host lowercased"""
+    start = url.find('://')
+    if start == -1:
+        return '', '', url
+    start += 3
+    end = len(url)
+    for separator in '/?#':
+        index = url.find(separator, start, end)
+        if index != -1:
+            end = index
+    return url[:start], url[start:end].lower(), url[end:]
+
+class ResultStore:
+    """Columnar, host-interned URL store; thread-safe.
+
+    With keep_urls=False only the per-host counts are kept, which is all a
+    run that streams its URLs to a sink needs to enforce max_per_host.
+    """
+
+    def __init__(self, max_per_host=None, keep_urls=True):
+        self.max_per_host = max_per_host
+        self.keep_urls = keep_urls
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self._heads = []
+            self._head_ids = {}
+            self._head_hosts = array('I')
+            self._hosts = []
+            self._host_ids = {}
+            self._host_counts = array('I')
+            self._head_column = array('I')
+            self._ends = array('Q')
+            self._rest = bytearray()
+            self._count = 0
+            self._index = None
+            self.capped = 0
+
+    def _head_id(self, scheme, host):
+        # Caller must hold the lock
+        head = scheme + host
+        head_id = self._head_ids.get(head)
+        if head_id is None:
+            host_id = self._host_ids.get(host)
+            if host_id is None:
+                host_id = self._host_ids[host] = len(self._hosts)
+                self._hosts.append(host)
+                self._host_counts.append(0)
+            head_id = self._head_ids[head] = len(self._heads)
+            self._heads.append(head)
+            self._head_hosts.append(host_id)
+        return head_id
+
+    def _add(self, url):
+        # Caller must hold the lock
+        scheme, host, rest = split_url(url)
+        head_id = self._head_id(scheme, host)
+        host_id = self._head_hosts[head_id]
+        if self.max_per_host is not None and self._host_counts[host_id] >= self.max_per_host:
+            self.capped += 1
+            return False
+        self._host_counts[host_id] += 1
+        self._count += 1
+        if self.keep_urls:
+            self._head_column.append(head_id)
+            self._rest += rest.encode('utf-8', 'surrogatepass')
+            self._rest += b'\n'
+            self._ends.append(len(self._rest))
+            self._index = None
+        return True
+
+    def add(self, url):
+        """Store url, return False if its host is already at max_per_host"""
+        with self.lock:
+            return self._add(url)
+
+    def extend(self, urls):
+        """Store urls, return the ones that were accepted"""
+        with self.lock:
+            return [url for url in urls if self._add(url)]
+
+    def __len__(self):
+        return self._count
+
+    def _url(self, position):
+        start = self._ends[position - 1] if position else 0
+        return (self._heads[self._head_column[position]]
+                + self._rest[start:self._ends[position] - 1].decode('utf-8', 'surrogatepass'))
+
+    def __getitem__(self, position):
+        if not self.keep_urls:
+            raise IndexError("URLs are not kept by this store")
+        if position < 0:
+            position += len(self._ends)
+        if not 0 <= position < len(self._ends):
+            raise IndexError(position)
+        return self._url(position)
+
+    def __iter__(self):
+        """URLs in the order they were added"""
+        for position in range(len(self._ends)):
+            yield self._url(position)
+
+    def host_counts(self):
+        """{host: URLs accepted from it}"""
+        with self.lock:
+            return dict(zip(self._hosts, self._host_counts))
+
+    def top_hosts(self, n=None):
+        """[(host, count)] with the most URLs first"""
+        return sorted(self.host_counts().items(), key=lambda item: -item[1])[:n]
+
+    def _host_index(self):
+        """(starts, positions): positions[starts[h]:starts[h + 1]] are host h's URLs, in order"""
+        with self.lock:
+            if self._index is None:
+                host_column = array('I', map(self._head_hosts.__getitem__, self._head_column))
+                # A stable sort keeps each host's URLs in the order they were added
+                positions = array('Q', sorted(range(len(host_column)), key=host_column.__getitem__))
+                starts = array('Q', accumulate(self._host_counts, initial=0))
+                self._index = (starts, positions)
+            return self._index
+
+    def urls_for(self, host):
+        """URLs stored for host, in the order they were added"""
+        host_id = self._host_ids.get(host.lower())
+        if host_id is None:
+            return []
+        starts, positions = self._host_index()
+        return [self._url(position) for position in positions[starts[host_id]:starts[host_id + 1]]]
+
+    def by_host(self):
+        """Yield (host, [urls]) for every host with stored URLs"""
+        starts, positions = self._host_index()
+        for host_id, host in enumerate(self._hosts):
+            if starts[host_id] != starts[host_id + 1]:
+                yield host, [self._url(position)
+                             for position in positions[starts[host_id]:starts[host_id + 1]]]
+
+    def _lines(self, start, stop):
+        """URLs start..stop-1, one per line, decoding their paths in one go"""
+        base = self._ends[start - 1] if start else 0
+        rests = self._rest[base:self._ends[stop - 1]].decode('utf-8', 'surrogatepass').split('\n')
+        if len(rests) != stop - start + 1:
+            # A URL with a raw newline in it
+            return ''.join(self._url(position) + '\n' for position in range(start, stop))
+        heads = map(self._heads.__getitem__, self._head_column[start:stop])
+        return ''.join(chain.from_iterable(zip(heads, rests, repeat('\n'))))
+
+    def export(self, target, group_by_host=False, chunk_size=65536):
+        """Write one URL per line to a path or text file object, return the count"""
+        if isinstance(target, (str, os.PathLike)):
+            with open(target, 'w', encoding='utf-8', errors='surrogatepass', newline='\n') as f:
+                return self.export(f, group_by_host, chunk_size)
+        total = len(self._ends)
+        if not group_by_host:
+            for start in range(0, total, chunk_size):
+                target.write(self._lines(start, min(start + chunk_size, total)))
+            return total
+        starts, positions = self._host_index()
+        heads, head_column, ends, rest = self._heads, self._head_column, self._ends, self._rest
+        for start in range(0, len(positions), chunk_size):
+            # Each rest keeps its newline, so a line is head + rest[previous end:end]
+            lines = []
+            for position in positions[start:start + chunk_size]:
+                line = rest[ends[position - 1] if position else 0:ends[position]]
+                lines.append(heads[head_column[position]] + line.decode('utf-8', 'surrogatepass'))
+            target.write(''.join(lines))
+        return len(positions)
+
+    def memory_bytes(self):
+        """Approximate bytes held by the columns and the interned tables"""
+        columns = (self._head_column, self._ends, self._head_hosts, self._host_counts)
+        total = sum(column.buffer_info()[1] * column.itemsize for column in columns) + len(self._rest)
+        for table, ids in ((self._heads, self._head_ids), (self._hosts, self._host_ids)):
+            total += sum(map(sys.getsizeof, table)) + sys.getsizeof(table) + sys.getsizeof(ids)
+        return total
+
+def synthetic_urls(count, hosts=200000, seed=1):
+    """Deterministic search-result-like URLs spread over a skewed set of hosts"""
+    import random
+    rng = random.Random(seed)
+    tlds = ('com', 'org', 'net', 'co.uk', 'de')
+    names = [f"{'www.' if i % 3 else ''}site{i}.{tlds[i % 5]}" for i in range(hosts)]
+    for i in range(count):
+        host = names[min(int(rng.paretovariate(1.2)) - 1, hosts - 1) if i % 4 == 0 else rng.randrange(hosts)]
+        section = ('blog', 'news', 'wiki', 'docs')[i % 4]
+        yield f"https://{host}/{section}/{i:x}/index.php?id={i % 9973}&ref=serp"
+
+def bench(count, path=os.devnull, max_per_host=None):
+    """Memory and export time of a plain list against a ResultStore holding the same URLs"""
+    rows = {}
+
+    started = time.perf_counter()
+    urls = list(synthetic_urls(count))
+    rows['list_build_s'] = time.perf_counter() - started
+    rows['list_bytes'] = sys.getsizeof(urls) + sum(sys.getsizeof(url) for url in urls)
+    started = time.perf_counter()
+    # What DorkEngine.save_results used to do
+    with open(path, 'w', encoding='utf-8') as f:
+        for url in urls:
+            f.write(f"{url}\n")
+    rows['list_export_s'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store = ResultStore(max_per_host)
+    for start in range(0, count, 100000):
+        store.extend(urls[start:start + 100000])
+    rows['store_build_s'] = time.perf_counter() - started
+    del urls
+    rows['store_bytes'] = store.memory_bytes()
+    rows['store_urls'] = len(store)
+    rows['store_capped'] = store.capped
+    rows['hosts'] = len(store.host_counts())
+    started = time.perf_counter()
+    store.export(path)
+    rows['store_export_s'] = time.perf_counter() - started
+    started = time.perf_counter()
+    store.export(path, group_by_host=True)
+    rows['store_export_grouped_s'] = time.perf_counter() - started
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare ResultStore with a plain list of URL strings.")
+    parser.add_argument('--bench', type=int, default=1000000, metavar='N',
+                        help="number of URLs (default: 1000000)")
+    parser.add_argument('--max-per-host', type=int, help="cap URLs per host in the store")
+    parser.add_argument('-o', '--output', default=os.devnull, help="export target (default: the null device)")
+    args = parser.parse_args(argv)
+
+    rows = bench(args.bench, args.output, args.max_per_host)
+    print(f"{args.bench} URLs over {rows['hosts']} hosts")
+    print(f"list   {rows['list_bytes'] / 1048576:8.1f} MB  export {rows['list_export_s']:6.2f}s")
+    print(f"store  {rows['store_bytes'] / 1048576:8.1f} MB  export {rows['store_export_s']:6.2f}s "
+          f"(grouped by host {rows['store_export_grouped_s']:.2f}s)  build {rows['store_build_s']:.2f}s")
+    if args.max_per_host is not None:
+        print(f"capped {rows['store_capped']} URLs, kept {rows['store_urls']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())